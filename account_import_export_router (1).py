@@ -1,13 +1,16 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Response
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import uuid
 import json
-import csv
-import io
+import asyncpg
 from datetime import datetime
 from backend.db import get_pg_pool
-from backend.security import SecurityManager
+from backend.security import get_security_manager
+from backend.utils.csv_stream import iter_csv_batches
+from backend.utils.export_stream import MEDIA_TYPES, stream_query
 
 router = APIRouter(prefix="/api/accounts", tags=["import-export"])
 
@@ -27,8 +30,6 @@ class AccountExportResponse(BaseModel):
     export_date: datetime
     accounts: List[Dict[str, Any]]
 
-security_manager = SecurityManager()
-
 @router.post("/import")
 async def import_accounts(import_data: AccountImportRequest):
     """Import social accounts from JSON data"""
@@ -47,7 +48,13 @@ async def import_accounts(import_data: AccountImportRequest):
             imported_accounts = []
             failed_imports = []
             
-            for account in import_data.accounts:
+            # Encrypt every token in one batch off the event loop
+            encrypted_tokens = await _encrypt_token_pairs([
+                (account.access_token or None, account.refresh_token or None)
+                for account in import_data.accounts
+            ])
+            
+            for index, account in enumerate(import_data.accounts):
                 try:
                     # Check if account already exists
                     existing = await connection.fetchrow(
@@ -64,14 +71,15 @@ async def import_accounts(import_data: AccountImportRequest):
                         })
                         continue
                     
-                    # Encrypt sensitive data if provided
-                    encrypted_access_token = None
-                    encrypted_refresh_token = None
+                    if isinstance(encrypted_tokens[index], Exception):
+                        failed_imports.append({
+                            "account": account.account_handle,
+                            "platform": account.platform,
+                            "reason": f"Token encryption failed: {encrypted_tokens[index]}"
+                        })
+                        continue
                     
-                    if account.access_token:
-                        encrypted_access_token = security_manager.encrypt(account.access_token)
-                    if account.refresh_token:
-                        encrypted_refresh_token = security_manager.encrypt(account.refresh_token)
+                    encrypted_access_token, encrypted_refresh_token = encrypted_tokens[index]
                     
                     # Insert account
                     account_id = await connection.fetchval(
@@ -109,20 +117,265 @@ async def import_accounts(import_data: AccountImportRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Import error: {str(e)}")
 
+# Rows parsed, encrypted and staged per COPY round trip
+IMPORT_BATCH_SIZE = 5000
+
+# Entries kept in each sample list of the CSV import report
+IMPORT_REPORT_SAMPLE_SIZE = 100
+
+# Staging table layout used by the COPY-based CSV import
+IMPORT_STAGING_COLUMNS = [
+    'row_no', 'platform', 'account_handle', 'account_id', 'access_token', 'refresh_token'
+]
+
+# Column limits of social_accounts, checked before COPY so one bad value
+# is reported as a row failure instead of aborting the whole batch
+IMPORT_FIELD_LIMITS = {'platform': 100, 'account_handle': 255, 'account_id': 255}
+
+def _validate_import_fields(fields: Dict[str, Any]):
+    """Return the reason a row cannot be stored, or None if it is valid"""
+    for name, value in fields.items():
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            return f"Invalid value for {name}"
+        if '\x00' in value:
+            return f"Invalid character in {name}"
+        limit = IMPORT_FIELD_LIMITS.get(name)
+        if limit and len(value) > limit:
+            return f"Field too long: {name} (max {limit} characters)"
+    return None
+
+def _encrypt_pairs_one_by_one(security, pairs: List[tuple]) -> List[Any]:
+    results = []
+    for pair in pairs:
+        try:
+            results.append(tuple(security.encrypt_many(pair)))
+        except Exception as e:
+            results.append(e)
+    return results
+
+async def _encrypt_token_pairs(pairs: List[tuple]) -> List[Any]:
+    """Encrypt (access_token, refresh_token) pairs in one batch off the event loop
+    
+    If the batch fails it is retried pair by pair, so a token that cannot be
+    encrypted only fails its own row; that row gets the exception instead of a pair.
+    """
+    security = get_security_manager()
+    try:
+        encrypted = await security.encrypt_many_async(token for pair in pairs for token in pair)
+    except Exception:
+        return await run_in_threadpool(_encrypt_pairs_one_by_one, security, pairs)
+    return [(encrypted[2 * index], encrypted[2 * index + 1]) for index in range(len(pairs))]
+
+async def _bulk_insert_social_accounts(connection, user_id: uuid.UUID, records: List[tuple]):
+    """Stage rows with COPY and insert them with a single set-based statement.
+
+    Must run inside a transaction. Returns a dict mapping
+    (platform, account_handle) to the new account id for every inserted row;
+    rows missing from the result already existed (or were repeated in the batch).
+    """
+    await connection.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS social_accounts_import (
+               row_no INTEGER NOT NULL,
+               platform VARCHAR(100) NOT NULL,
+               account_handle VARCHAR(255) NOT NULL,
+               account_id VARCHAR(255),
+               access_token TEXT,
+               refresh_token TEXT
+           ) ON COMMIT DROP"""
+    )
+    await connection.execute("TRUNCATE social_accounts_import")
+    await connection.copy_records_to_table(
+        'social_accounts_import', records=records, columns=IMPORT_STAGING_COLUMNS
+    )
+    
+    inserted = await connection.fetch(
+        """INSERT INTO social_accounts
+               (user_id, platform, account_handle, account_id, access_token, refresh_token)
+           SELECT DISTINCT ON (platform, account_handle)
+                  $1::uuid, platform, account_handle, account_id, access_token, refresh_token
+           FROM social_accounts_import
+           ORDER BY platform, account_handle, row_no
+           ON CONFLICT (platform, account_handle) DO NOTHING
+           RETURNING id, platform, account_handle""",
+        user_id
+    )
+    
+    return {(row['platform'], row['account_handle']): row['id'] for row in inserted}
+
+async def _insert_social_accounts_one_by_one(connection, user_id: uuid.UUID, records: List[tuple]):
+    """Fallback for a batch the set-based insert rejected
+    
+    Each row is inserted in its own transaction, so a bad row only fails
+    itself. Returns (inserted, errors): inserted has the same shape as
+    _bulk_insert_social_accounts, errors maps (platform, account_handle)
+    to the failure reason.
+    """
+    inserted = {}
+    errors = {}
+    
+    for _, platform, account_handle, account_id, access_token, refresh_token in records:
+        key = (platform, account_handle)
+        if key in inserted or key in errors:
+            continue
+        try:
+            async with connection.transaction():
+                new_id = await connection.fetchval(
+                    """INSERT INTO social_accounts
+                           (user_id, platform, account_handle, account_id, access_token, refresh_token)
+                       VALUES ($1, $2, $3, $4, $5, $6)
+                       ON CONFLICT (platform, account_handle) DO NOTHING
+                       RETURNING id""",
+                    user_id, platform, account_handle, account_id, access_token, refresh_token
+                )
+        except (asyncpg.PostgresError, asyncpg.DataError) as e:
+            errors[key] = str(e)
+            continue
+        if new_id is not None:
+            inserted[key] = new_id
+    
+    return inserted, errors
+
+class _ImportReport:
+    """Import outcome counters with bounded samples
+    
+    Every row is counted, but only the first IMPORT_REPORT_SAMPLE_SIZE
+    imported and failed entries are kept, so the report does not grow with
+    the size of the uploaded file.
+    """
+    
+    def __init__(self, sample_size: int):
+        self.sample_size = sample_size
+        self.imported_count = 0
+        self.failed_count = 0
+        self.imported_accounts = []
+        self.failed_imports = []
+    
+    def imported(self, entry: Dict[str, Any]):
+        self.imported_count += 1
+        if len(self.imported_accounts) < self.sample_size:
+            self.imported_accounts.append(entry)
+    
+    def failed(self, entry: Dict[str, Any]):
+        self.failed_count += 1
+        if len(self.failed_imports) < self.sample_size:
+            self.failed_imports.append(entry)
+
+async def _prepare_import_records(rows: List[Dict[str, str]], first_row_no: int, report: _ImportReport):
+    """Validate CSV rows and encrypt their tokens into staging records
+    
+    Tokens of the whole batch are encrypted with one encrypt_many call on the
+    thread pool instead of row by row on the event loop; a row whose tokens
+    cannot be encrypted is reported as failed.
+    """
+    records = []
+    tokens = []
+    
+    for row_no, row in enumerate(rows, start=first_row_no):
+        try:
+            # Expected CSV columns: platform, account_handle, account_id, access_token, refresh_token
+            platform = (row.get('platform') or '').strip()
+            account_handle = (row.get('account_handle') or '').strip()
+            
+            if not platform or not account_handle:
+                report.failed({
+                    "row": row_no,
+                    "reason": "Missing required fields: platform and account_handle"
+                })
+                continue
+            
+            access_token = (row.get('access_token') or '').strip()
+            refresh_token = (row.get('refresh_token') or '').strip()
+            account_id = (row.get('account_id') or '').strip() or None
+            
+            reason = _validate_import_fields({
+                'platform': platform,
+                'account_handle': account_handle,
+                'account_id': account_id
+            })
+            if reason:
+                report.failed({
+                    "row": row_no,
+                    "reason": reason
+                })
+                continue
+            
+            records.append((row_no, platform, account_handle, account_id))
+            tokens.append((access_token or None, refresh_token or None))
+            
+        except Exception as e:
+            report.failed({
+                "row": row_no,
+                "reason": str(e)
+            })
+    
+    # Encrypt tokens if provided
+    staged = []
+    for record, encrypted in zip(records, await _encrypt_token_pairs(tokens)):
+        if isinstance(encrypted, Exception):
+            report.failed({
+                "row": record[0],
+                "reason": f"Token encryption failed: {encrypted}"
+            })
+            continue
+        staged.append(record + encrypted)
+    return staged
+
+async def _import_batch(connection, user_id: uuid.UUID, records: List[tuple], report: _ImportReport):
+    """Insert one staged batch in its own transaction and record the outcome of every row"""
+    errors = {}
+    try:
+        async with connection.transaction():
+            inserted = await _bulk_insert_social_accounts(connection, user_id, records)
+    except (asyncpg.PostgresError, asyncpg.DataError):
+        # The batch was rolled back as a whole; retry it row by row
+        inserted, errors = await _insert_social_accounts_one_by_one(connection, user_id, records)
+    
+    # Rebuild the per-row report from the set of inserted keys
+    for row_no, platform, account_handle, *_ in records:
+        account_id = inserted.pop((platform, account_handle), None)
+        
+        if (platform, account_handle) in errors:
+            report.failed({
+                "row": row_no,
+                "account": account_handle,
+                "platform": platform,
+                "reason": errors.pop((platform, account_handle))
+            })
+            continue
+        
+        if account_id is None:
+            report.failed({
+                "row": row_no,
+                "account": account_handle,
+                "platform": platform,
+                "reason": "Account already exists"
+            })
+            continue
+        
+        report.imported({
+            "id": str(account_id),
+            "platform": platform,
+            "account_handle": account_handle
+        })
+
 @router.post("/import-csv")
 async def import_accounts_csv(user_id: str, file: UploadFile = File(...)):
-    """Import social accounts from CSV file"""
+    """Import social accounts from CSV file
+    
+    The upload is parsed in bounded batches straight from the spooled file,
+    and each batch is staged with COPY and committed on its own, so a failure
+    never rolls back rows already reported as imported. The report carries
+    full counts but only a bounded sample of entries (rows are numbered from 1),
+    so memory use does not grow with file size.
+    """
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="File must be a CSV")
     
     pool = await get_pg_pool()
     
     try:
-        # Read CSV content
-        content = await file.read()
-        csv_data = content.decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_data))
-        
         async with pool.acquire() as connection:
             # Verify user exists
             user = await connection.fetchrow(
@@ -132,185 +385,168 @@ async def import_accounts_csv(user_id: str, file: UploadFile = File(...)):
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
             
-            imported_accounts = []
-            failed_imports = []
+            report = _ImportReport(IMPORT_REPORT_SAMPLE_SIZE)
+            rows_processed = 0
             
-            for row in csv_reader:
-                try:
-                    # Expected CSV columns: platform, account_handle, account_id, access_token, refresh_token
-                    platform = row.get('platform', '').strip()
-                    account_handle = row.get('account_handle', '').strip()
-                    
-                    if not platform or not account_handle:
-                        failed_imports.append({
-                            "row": row,
-                            "reason": "Missing required fields: platform and account_handle"
-                        })
-                        continue
-                    
-                    # Check if account already exists
-                    existing = await connection.fetchrow(
-                        """SELECT id FROM social_accounts 
-                           WHERE platform = $1 AND account_handle = $2""",
-                        platform, account_handle
-                    )
-                    
-                    if existing:
-                        failed_imports.append({
-                            "account": account_handle,
-                            "platform": platform,
-                            "reason": "Account already exists"
-                        })
-                        continue
-                    
-                    # Encrypt tokens if provided
-                    access_token = row.get('access_token', '').strip()
-                    refresh_token = row.get('refresh_token', '').strip()
-                    
-                    encrypted_access_token = security_manager.encrypt(access_token) if access_token else None
-                    encrypted_refresh_token = security_manager.encrypt(refresh_token) if refresh_token else None
-                    
-                    # Insert account
-                    account_id = await connection.fetchval(
-                        """INSERT INTO social_accounts 
-                           (user_id, platform, account_handle, account_id, access_token, refresh_token)
-                           VALUES ($1, $2, $3, $4, $5, $6) RETURNING id""",
-                        uuid.UUID(user_id), platform, account_handle,
-                        row.get('account_id', '').strip() or None,
-                        encrypted_access_token, encrypted_refresh_token
-                    )
-                    
-                    imported_accounts.append({
-                        "id": str(account_id),
-                        "platform": platform,
-                        "account_handle": account_handle
-                    })
-                    
-                except Exception as e:
-                    failed_imports.append({
-                        "row": row,
-                        "reason": str(e)
-                    })
+            async for rows in iter_csv_batches(file, batch_size=IMPORT_BATCH_SIZE):
+                records = await _prepare_import_records(rows, rows_processed + 1, report)
+                rows_processed += len(rows)
+                
+                if records:
+                    await _import_batch(connection, user['id'], records, report)
             
             return {
                 "message": "CSV import completed",
-                "imported_count": len(imported_accounts),
-                "failed_count": len(failed_imports),
-                "imported_accounts": imported_accounts,
-                "failed_imports": failed_imports
+                "rows_processed": rows_processed,
+                "imported_count": report.imported_count,
+                "failed_count": report.failed_count,
+                "imported_accounts": report.imported_accounts,
+                "failed_imports": report.failed_imports,
+                "sample_size": report.sample_size
             }
-            
+    
+    except HTTPException:
+        raise
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user ID format")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CSV import error: {str(e)}")
 
+# Columns of the JSON export (tokens are never exported)
+JSON_EXPORT_FIELDNAMES = [
+    'id', 'platform', 'account_handle', 'account_id', 'account_status', 'created_at', 'updated_at'
+]
+
+async def _stream_json_export(pool, user_id: str, account_user_id: uuid.UUID):
+    """Wrap the streamed accounts array in the AccountExportResponse envelope"""
+    header = json.dumps({"user_id": user_id, "export_date": datetime.utcnow().isoformat()})
+    yield (header[:-1] + ', "accounts": ').encode()
+    async for chunk in stream_query(
+        pool,
+        """SELECT id, platform, account_handle, account_id, account_status, created_at, updated_at
+           FROM social_accounts WHERE user_id = $1 ORDER BY created_at DESC""",
+        account_user_id,
+        fieldnames=JSON_EXPORT_FIELDNAMES,
+        fmt="json"
+    ):
+        yield chunk
+    yield b"}"
+
 @router.get("/export/{user_id}", response_model=AccountExportResponse)
 async def export_accounts(user_id: str):
-    """Export all social accounts for a user"""
+    """Export all social accounts for a user
+    
+    The accounts array is streamed through a server-side cursor, so memory
+    use does not grow with the number of accounts.
+    """
     pool = await get_pg_pool()
     
     try:
         async with pool.acquire() as connection:
-            # Verify user exists
+            # Verify user exists before the response starts streaming
             user = await connection.fetchrow(
                 "SELECT id FROM users WHERE id = $1", uuid.UUID(user_id)
             )
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Fetch all accounts for the user (excluding sensitive tokens)
-            accounts = await connection.fetch(
-                """SELECT id, platform, account_handle, account_id, account_status, created_at, updated_at
-                   FROM social_accounts WHERE user_id = $1 ORDER BY created_at DESC""",
-                uuid.UUID(user_id)
-            )
-            
-            export_data = []
-            for account in accounts:
-                export_data.append({
-                    "id": str(account['id']),
-                    "platform": account['platform'],
-                    "account_handle": account['account_handle'],
-                    "account_id": account['account_id'],
-                    "account_status": account['account_status'],
-                    "created_at": account['created_at'].isoformat(),
-                    "updated_at": account['updated_at'].isoformat()
-                })
-            
-            return AccountExportResponse(
-                user_id=user_id,
-                export_date=datetime.utcnow(),
-                accounts=export_data
-            )
-            
+        
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        
+        return StreamingResponse(
+            _stream_json_export(pool, user_id, user['id']),
+            media_type=MEDIA_TYPES["json"]
+        )
+        
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user ID format")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
 
+# Columns written by the streaming exports (tokens are never exported)
+EXPORT_FIELDNAMES = ['platform', 'account_handle', 'account_id', 'account_status', 'created_at']
+
+async def _stream_accounts_export(user_id: str, export_format: str):
+    """Build a StreamingResponse that reads the user's accounts through a server-side cursor"""
+    pool = await get_pg_pool()
+    
+    async with pool.acquire() as connection:
+        # Verify user exists before the response starts streaming
+        user = await connection.fetchrow(
+            "SELECT id, user_account FROM users WHERE id = $1", uuid.UUID(user_id)
+        )
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    filename = f"social_accounts_{user['user_account']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    
+    return StreamingResponse(
+        stream_query(
+            pool,
+            """SELECT platform, account_handle, account_id, account_status, created_at
+               FROM social_accounts WHERE user_id = $1 ORDER BY platform, account_handle""",
+            user['id'],
+            fieldnames=EXPORT_FIELDNAMES,
+            fmt=export_format
+        ),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
 @router.get("/export-csv/{user_id}")
 async def export_accounts_csv(user_id: str):
     """Export social accounts as CSV file"""
-    pool = await get_pg_pool()
-    
     try:
-        async with pool.acquire() as connection:
-            # Verify user exists
-            user = await connection.fetchrow(
-                "SELECT id, user_account FROM users WHERE id = $1", uuid.UUID(user_id)
-            )
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Fetch all accounts
-            accounts = await connection.fetch(
-                """SELECT platform, account_handle, account_id, account_status, created_at
-                   FROM social_accounts WHERE user_id = $1 ORDER BY platform, account_handle""",
-                uuid.UUID(user_id)
-            )
-            
-            # Create CSV content
-            output = io.StringIO()
-            fieldnames = ['platform', 'account_handle', 'account_id', 'account_status', 'created_at']
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            
-            writer.writeheader()
-            for account in accounts:
-                writer.writerow({
-                    'platform': account['platform'],
-                    'account_handle': account['account_handle'],
-                    'account_id': account['account_id'] or '',
-                    'account_status': account['account_status'],
-                    'created_at': account['created_at'].isoformat()
-                })
-            
-            csv_content = output.getvalue()
-            output.close()
-            
-            # Return CSV file
-            filename = f"social_accounts_{user['user_account']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            return Response(
-                content=csv_content,
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-            
+        return await _stream_accounts_export(user_id, "csv")
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid user ID format")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"CSV export error: {str(e)}")
 
+@router.get("/export-stream/{user_id}")
+async def export_accounts_stream(
+    user_id: str,
+    format: str = Query("csv", pattern="^(csv|ndjson)$")
+):
+    """Stream social accounts as CSV or NDJSON without buffering the whole export"""
+    try:
+        return await _stream_accounts_export(user_id, format)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid user ID format")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Export error: {str(e)}")
+
+def _parse_account_ids(account_ids: List[str], failures: List[Dict[str, Any]]) -> Dict[uuid.UUID, str]:
+    """Parse requested ids once, recording malformed ones as failures
+    
+    Returns the valid ids (deduplicated, in request order) mapped to the
+    string the caller sent, so the report can echo it back unchanged.
+    """
+    parsed = {}
+    
+    for account_id in account_ids:
+        try:
+            parsed.setdefault(uuid.UUID(account_id), account_id)
+        except (ValueError, TypeError, AttributeError) as e:
+            failures.append({
+                "account_id": account_id,
+                "reason": str(e)
+            })
+    
+    return parsed
+
 @router.post("/bulk-update-status")
 async def bulk_update_account_status(
     user_id: str, 
     account_ids: List[str], 
     new_status: str
 ):
-    """Bulk update account status"""
+    """Bulk update account status with a single set-based UPDATE"""
     valid_statuses = ['active', 'inactive', 'suspended', 'pending']
     
     if new_status not in valid_statuses:
@@ -333,43 +569,33 @@ async def bulk_update_account_status(
             
             updated_accounts = []
             failed_updates = []
+            requested = _parse_account_ids(account_ids, failed_updates)
+            
+            rows = await connection.fetch(
+                """UPDATE social_accounts 
+                   SET account_status = $1, updated_at = $2 
+                   WHERE id = ANY($3::uuid[]) AND user_id = $4
+                   RETURNING id, account_handle, platform""",
+                new_status, datetime.utcnow(), list(requested), uuid.UUID(user_id)
+            )
+            updated = {row['id']: row for row in rows}
             
-            for account_id in account_ids:
-                try:
-                    # Check if account exists and belongs to user
-                    account = await connection.fetchrow(
-                        """SELECT id, account_handle, platform FROM social_accounts 
-                           WHERE id = $1 AND user_id = $2""",
-                        uuid.UUID(account_id), uuid.UUID(user_id)
-                    )
-                    
-                    if not account:
-                        failed_updates.append({
-                            "account_id": account_id,
-                            "reason": "Account not found or access denied"
-                        })
-                        continue
-                    
-                    # Update status
-                    await connection.execute(
-                        """UPDATE social_accounts 
-                           SET account_status = $1, updated_at = $2 
-                           WHERE id = $3""",
-                        new_status, datetime.utcnow(), uuid.UUID(account_id)
-                    )
-                    
-                    updated_accounts.append({
-                        "account_id": account_id,
-                        "account_handle": account['account_handle'],
-                        "platform": account['platform'],
-                        "new_status": new_status
-                    })
-                    
-                except Exception as e:
+            for account_uuid, account_id in requested.items():
+                account = updated.get(account_uuid)
+                
+                if not account:
                     failed_updates.append({
                         "account_id": account_id,
-                        "reason": str(e)
+                        "reason": "Account not found or access denied"
                     })
+                    continue
+                
+                updated_accounts.append({
+                    "account_id": account_id,
+                    "account_handle": account['account_handle'],
+                    "platform": account['platform'],
+                    "new_status": new_status
+                })
             
             return {
                 "message": "Bulk status update completed",
@@ -386,7 +612,7 @@ async def bulk_update_account_status(
 
 @router.delete("/bulk-delete")
 async def bulk_delete_accounts(user_id: str, account_ids: List[str]):
-    """Bulk delete social accounts"""
+    """Bulk delete social accounts with a single set-based DELETE"""
     pool = await get_pg_pool()
     
     try:
@@ -401,40 +627,32 @@ async def bulk_delete_accounts(user_id: str, account_ids: List[str]):
             
             deleted_accounts = []
             failed_deletes = []
+            requested = _parse_account_ids(account_ids, failed_deletes)
+            
+            # Delete accounts (CASCADE will handle related posts)
+            rows = await connection.fetch(
+                """DELETE FROM social_accounts
+                   WHERE id = ANY($1::uuid[]) AND user_id = $2
+                   RETURNING id, account_handle, platform""",
+                list(requested), uuid.UUID(user_id)
+            )
+            deleted = {row['id']: row for row in rows}
             
-            for account_id in account_ids:
-                try:
-                    # Check if account exists and belongs to user
-                    account = await connection.fetchrow(
-                        """SELECT id, account_handle, platform FROM social_accounts 
-                           WHERE id = $1 AND user_id = $2""",
-                        uuid.UUID(account_id), uuid.UUID(user_id)
-                    )
-                    
-                    if not account:
-                        failed_deletes.append({
-                            "account_id": account_id,
-                            "reason": "Account not found or access denied"
-                        })
-                        continue
-                    
-                    # Delete account (CASCADE will handle related posts)
-                    await connection.execute(
-                        "DELETE FROM social_accounts WHERE id = $1",
-                        uuid.UUID(account_id)
-                    )
-                    
-                    deleted_accounts.append({
-                        "account_id": account_id,
-                        "account_handle": account['account_handle'],
-                        "platform": account['platform']
-                    })
-                    
-                except Exception as e:
+            for account_uuid, account_id in requested.items():
+                account = deleted.get(account_uuid)
+                
+                if not account:
                     failed_deletes.append({
                         "account_id": account_id,
-                        "reason": str(e)
+                        "reason": "Account not found or access denied"
                     })
+                    continue
+                
+                deleted_accounts.append({
+                    "account_id": account_id,
+                    "account_handle": account['account_handle'],
+                    "platform": account['platform']
+                })
             
             return {
                 "message": "Bulk delete completed",
@@ -4,9 +4,15 @@ Enhanced with comprehensive user management and security features
 """
 
 import asyncio
+import base64
+import functools
 import hashlib
+import os
 import secrets
 import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict
@@ -14,12 +20,18 @@ from enum import Enum
 import json
 import logging
 
+from backend.utils.cache import TTLCache
+
 try:
     from supabase import create_client, Client
+    from gotrue import SyncGoTrueClient
     from gotrue.errors import AuthApiError
+    from gotrue.helpers import parse_user_response
 except ImportError:
     print("Warning: supabase-py not installed. Install with: pip install supabase")
     Client = None
+    SyncGoTrueClient = None
+    parse_user_response = None
     AuthApiError = Exception
 
 # Configure logging
@@ -61,18 +73,177 @@ class AuthSession:
     expires_at: int
     token_type: str = "bearer"
 
+def _jwt_claims(token: str) -> Dict[str, Any]:
+    """Decode the claims of a JWT without verifying it; empty for anything else"""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return claims if isinstance(claims, dict) else {}
+    except (IndexError, TypeError, ValueError):
+        return {}
+
+def _token_expiry(access_token: str) -> Optional[int]:
+    """Read the ``exp`` claim of a JWT without verifying it (the caller verifies the token)"""
+    try:
+        return int(_jwt_claims(access_token)['exp'])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+def _is_service_role_key(key: str) -> bool:
+    """Legacy service_role JWT or new-style secret key"""
+    return key.startswith("sb_secret_") or _jwt_claims(key).get("role") == "service_role"
+
+# Legacy hash_password() cost; PasswordHasher upgrades hashes below its target on verify
+LEGACY_PBKDF2_ITERATIONS = 100000
+# Target cost for new hashes (OWASP 2023 guidance for PBKDF2-HMAC-SHA256);
+# tune per deployment with ``python auth_module.py bench``
+PBKDF2_ITERATIONS = int(os.getenv("PBKDF2_ITERATIONS", "600000"))
+PBKDF2_PREFIX = "pbkdf2_sha256"
+
+def _pbkdf2_hex(password: str, salt: str, iterations: int) -> str:
+    """PBKDF2-HMAC-SHA256 digest (module-level so worker processes can unpickle it)"""
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+class PasswordHasher:
+    """Async PBKDF2 password hashing on a process pool
+    
+    Hashes are encoded as ``pbkdf2_sha256$<iterations>$<salt>$<hex digest>`` so
+    the cost can be raised later: ``verify`` returns a re-hashed value whenever
+    a stored hash is weaker than the current ``iterations`` target.
+    """
+    
+    def __init__(self, iterations: int = PBKDF2_ITERATIONS, max_workers: Optional[int] = None,
+                 max_concurrency: Optional[int] = None):
+        self.iterations = iterations
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Bound queued work so a login burst cannot pile up unbounded futures
+        self._semaphore = asyncio.Semaphore(max_concurrency or self.max_workers * 2)
+    
+    async def _derive(self, password: str, salt: str, iterations: int) -> str:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _pbkdf2_hex, password, salt, iterations)
+    
+    @staticmethod
+    def encode(iterations: int, salt: str, digest: str) -> str:
+        return f"{PBKDF2_PREFIX}${iterations}${salt}${digest}"
+    
+    @staticmethod
+    def decode(encoded: str) -> Tuple[int, str, str]:
+        prefix, iterations, salt, digest = encoded.split("$", 3)
+        if prefix != PBKDF2_PREFIX:
+            raise ValueError(f"Unsupported password hash format: {prefix}")
+        return int(iterations), salt, digest
+    
+    def needs_rehash(self, encoded: str) -> bool:
+        iterations, _, _ = self.decode(encoded)
+        return iterations < self.iterations
+    
+    async def hash(self, password: str, salt: Optional[str] = None) -> str:
+        """Hash a password with the current parameters"""
+        salt = salt or secrets.token_hex(16)
+        digest = await self._derive(password, salt, self.iterations)
+        return self.encode(self.iterations, salt, digest)
+    
+    async def verify(self, password: str, encoded: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password; returns (valid, upgraded hash or None)"""
+        iterations, salt, digest = self.decode(encoded)
+        candidate = await self._derive(password, salt, iterations)
+        if not secrets.compare_digest(candidate, digest):
+            return False, None
+        if iterations < self.iterations:
+            return True, await self.hash(password)
+        return True, None
+    
+    async def verify_legacy(self, password: str, password_hash: str, salt: str) -> Tuple[bool, Optional[str]]:
+        """Verify a (hash, salt) pair produced by SupabaseAuth.hash_password"""
+        return await self.verify(password, self.encode(LEGACY_PBKDF2_ITERATIONS, salt, password_hash))
+    
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+async def benchmark_password_hasher(rounds: int = 64, hasher: Optional[PasswordHasher] = None) -> Dict[str, float]:
+    """Compare hashing ``rounds`` passwords inline on the event loop vs. on the process pool"""
+    owned = hasher is None
+    hasher = hasher or PasswordHasher()
+    passwords = [secrets.token_urlsafe(12) for _ in range(rounds)]
+    
+    started = time.perf_counter()
+    for password in passwords:
+        _pbkdf2_hex(password, "benchmark-salt", hasher.iterations)
+    inline = time.perf_counter() - started
+    
+    await hasher.hash("warmup")  # exclude worker start-up from the timing
+    started = time.perf_counter()
+    await asyncio.gather(*(hasher.hash(password) for password in passwords))
+    pooled = time.perf_counter() - started
+    if owned:
+        hasher.close()
+    
+    return {
+        "rounds": rounds,
+        "iterations": hasher.iterations,
+        "workers": hasher.max_workers,
+        "inline_hashes_per_sec": round(rounds / inline, 1),
+        "pooled_hashes_per_sec": round(rounds / pooled, 1),
+        "speedup": round(inline / pooled, 2),
+    }
+
 class SupabaseAuth:
     """Enhanced Supabase Authentication Manager"""
     
-    def __init__(self, supabase_url: str, supabase_key: str):
-        """Initialize Supabase client"""
+    def __init__(self, supabase_url: str, supabase_key: str, max_workers: int = 8,
+                 password_hasher: Optional[PasswordHasher] = None, stateless: bool = False,
+                 session_cache_size: int = 10000, session_cache_ttl: float = 300.0):
+        """Initialize Supabase client
+        
+        supabase-py is synchronous, so every client call is dispatched to a
+        bounded thread pool of ``max_workers`` threads instead of blocking the
+        event loop.
+        
+        Sessions are request scoped: ``authenticate(access_token)`` verifies a
+        bearer token and caches the resolved session (LRU, at most
+        ``session_cache_ttl`` seconds and never past the token's expiry), and
+        user-scoped methods take that session as ``session=``. With
+        ``stateless=True`` the manager never keeps a signed-in session of its
+        own, so one instance can be shared by all requests of a worker.
+        
+        Calls that issue or use a user's session (sign-in, sign-up, refresh,
+        OTP verification, password/email changes) go through one dedicated,
+        pooled GoTrue client instead of ``self.client``, so ``self.client``
+        only ever sends ``supabase_key`` and its table calls never run as
+        whichever user signed in last. The dedicated client's own remembered
+        session is never read: every input, including the user's access token
+        for ``update_user``, is passed per request.
+        
+        ``supabase_key`` should be the service role key on the server:
+        ``delete_account`` uses the admin API and is refused with any other key.
+        """
         if not Client:
             raise ImportError("supabase-py is required. Install with: pip install supabase")
         
         self.supabase_url = supabase_url
         self.supabase_key = supabase_key
         self.client: Client = create_client(supabase_url, supabase_key)
+        self._auth_client = SyncGoTrueClient(
+            url=f"{supabase_url.rstrip('/')}/auth/v1",
+            headers={"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"},
+            auto_refresh_token=False,
+            persist_session=False,
+        )
+        self.is_service_role = _is_service_role_key(supabase_key)
         self._current_session: Optional[AuthSession] = None
+        self.stateless = stateless
+        self.session_cache_ttl = session_cache_ttl
+        self._sessions = TTLCache(maxsize=session_cache_size, ttl=session_cache_ttl)
+        self._session_lookups: Dict[str, asyncio.Future] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="supabase-auth")
+        self.password_hasher = password_hasher or PasswordHasher()
         
         # Password requirements
         self.password_min_length = 8
@@ -81,6 +252,104 @@ class SupabaseAuth:
         self.password_require_numbers = True
         self.password_require_special = True
         
+    async def _run_sync(self, func, *args, **kwargs):
+        """Run a blocking supabase-py call on the auth thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def _auth_call(self, method: str, *args):
+        """Call a GoTrue method whose inputs are all in ``args`` on the dedicated auth client"""
+        return await self._run_sync(getattr(self._auth_client, method), *args)
+    
+    def close(self) -> None:
+        """Release the auth thread pool, the auth HTTP client and password hashing workers"""
+        self._executor.shutdown(wait=False)
+        self._auth_client.close()
+        self.password_hasher.close()
+    
+    def _cache_session(self, session: AuthSession) -> None:
+        """Cache a session by access token until the token expires"""
+        ttl = min(self.session_cache_ttl, session.expires_at - time.time())
+        if ttl > 0:
+            self._sessions.set(session.access_token, session, ttl=ttl)
+    
+    def _set_session(self, session: AuthSession) -> AuthSession:
+        """Record a newly issued session"""
+        self._cache_session(session)
+        if not self.stateless:
+            self._current_session = session
+        return session
+    
+    async def authenticate(self, access_token: str) -> AuthSession:
+        """Resolve the session for a request's access token
+        
+        Cached sessions are returned without a round trip; concurrent requests
+        carrying the same uncached token share one verification call.
+        """
+        session = self._sessions.get(access_token)
+        if session is not None:
+            return session
+        
+        lookup = self._session_lookups.get(access_token)
+        if lookup is None:
+            lookup = asyncio.ensure_future(self._load_session(access_token))
+            self._session_lookups[access_token] = lookup
+            lookup.add_done_callback(lambda _: self._session_lookups.pop(access_token, None))
+        # Shielded so a cancelled request does not cancel the lookup for the others
+        return await asyncio.shield(lookup)
+    
+    async def _load_session(self, access_token: str) -> AuthSession:
+        """Verify an access token with Supabase and build its session"""
+        expires_at = _token_expiry(access_token)
+        if expires_at is None:
+            raise AuthError("Invalid access token")
+        if expires_at <= time.time():
+            raise AuthError("Session expired")
+        
+        try:
+            response = await self._run_sync(self.client.auth.get_user, access_token)
+        except AuthApiError as e:
+            raise AuthError(f"Invalid access token: {str(e)}")
+        
+        if not response or not response.user:
+            raise AuthError("Invalid access token")
+        
+        profile_data = await self._get_user_profile(response.user.id)
+        session = AuthSession(
+            access_token=access_token,
+            refresh_token="",
+            user=UserProfile(
+                id=response.user.id,
+                email=response.user.email,
+                username=profile_data.get('username'),
+                full_name=profile_data.get('full_name'),
+                avatar_url=profile_data.get('avatar_url'),
+                bio=profile_data.get('bio'),
+                website=profile_data.get('website'),
+                role=profile_data.get('role') or UserRole.USER.value,
+                is_email_verified=response.user.email_confirmed_at is not None,
+                created_at=response.user.created_at
+            ),
+            expires_at=expires_at
+        )
+        self._cache_session(session)
+        return session
+    
+    def invalidate_session(self, access_token: str) -> None:
+        """Drop a cached session, e.g. after the user signs out elsewhere"""
+        self._sessions.pop(access_token)
+    
+    async def _update_auth_user(self, session: AuthSession, attributes: Dict[str, Any]):
+        """Update the auth user behind ``session`` with that user's own token
+        
+        Same request as GoTrue's ``update_user``, which would first need the
+        session stored on the shared client; the token is sent per request instead.
+        """
+        return await self._run_sync(
+            self._auth_client._request, "PUT", "user",
+            body=attributes, jwt=session.access_token, xform=parse_user_response,
+        )
+    
     @property
     def current_user(self) -> Optional[UserProfile]:
         """Get current authenticated user"""
@@ -164,7 +433,7 @@ class SupabaseAuth:
                     user_metadata[field] = kwargs[field]
             
             # Sign up user
-            response = self.client.auth.sign_up({
+            response = await self._auth_call("sign_up", {
                 "email": email,
                 "password": password,
                 "options": {
@@ -188,17 +457,17 @@ class SupabaseAuth:
                 
                 # Create session if user is confirmed
                 if response.session:
-                    self._current_session = AuthSession(
+                    session = self._set_session(AuthSession(
                         access_token=response.session.access_token,
                         refresh_token=response.session.refresh_token,
                         user=profile,
                         expires_at=response.session.expires_at
-                    )
+                    ))
                     
                     # Log activity
                     await self._log_activity("user_signup", "auth", response.user.id)
                     
-                    return self._current_session
+                    return session
                 else:
                     logger.info(f"User {email} signed up successfully. Email confirmation required.")
                     raise AuthError("Email confirmation required. Please check your email.")
@@ -223,7 +492,7 @@ class SupabaseAuth:
             if not self.validate_email(email):
                 raise AuthError("Invalid email format")
             
-            response = self.client.auth.sign_in_with_password({
+            response = await self._auth_call("sign_in_with_password", {
                 "email": email,
                 "password": password
             })
@@ -245,12 +514,12 @@ class SupabaseAuth:
                     last_login=datetime.now().isoformat()
                 )
                 
-                self._current_session = AuthSession(
+                session = self._set_session(AuthSession(
                     access_token=response.session.access_token,
                     refresh_token=response.session.refresh_token,
                     user=profile,
                     expires_at=response.session.expires_at
-                )
+                ))
                 
                 # Update last login
                 await self._update_last_login(response.user.id)
@@ -259,7 +528,7 @@ class SupabaseAuth:
                 await self._log_activity("user_signin", "auth", response.user.id)
                 
                 logger.info(f"User {email} signed in successfully")
-                return self._current_session
+                return session
             
             raise AuthError("Invalid credentials")
             
@@ -277,15 +546,19 @@ class SupabaseAuth:
             logger.error(f"Sign in error: {e}")
             raise AuthError(f"Sign in failed: {str(e)}")
     
-    async def sign_out(self) -> bool:
+    async def sign_out(self, session: Optional[AuthSession] = None) -> bool:
         """Sign out current user"""
         try:
-            if self._current_session:
+            session = session or self._current_session
+            if session:
                 # Log activity before signing out
-                await self._log_activity("user_signout", "auth", self._current_session.user.id)
+                await self._log_activity("user_signout", "auth", session.user.id)
+                self._sessions.pop(session.access_token)
+                # Revokes the session with the user's own token; nothing is stored on the client
+                await self._run_sync(self.client.auth.admin.sign_out, session.access_token)
             
-            response = self.client.auth.sign_out()
-            self._current_session = None
+            if session is self._current_session:
+                self._current_session = None
             
             logger.info("User signed out successfully")
             return True
@@ -294,27 +567,34 @@ class SupabaseAuth:
             logger.error(f"Sign out error: {e}")
             return False
     
-    async def refresh_session(self) -> Optional[AuthSession]:
+    async def refresh_session(self, session: Optional[AuthSession] = None) -> Optional[AuthSession]:
         """Refresh current session"""
+        session = session or self._current_session
         try:
-            if not self._current_session:
+            # Sessions resolved from a bearer token carry no refresh token; the client refreshes those
+            if not session or not session.refresh_token:
                 return None
             
-            response = self.client.auth.refresh_session(self._current_session.refresh_token)
+            response = await self._auth_call("refresh_session", session.refresh_token)
             
             if response.session:
-                self._current_session.access_token = response.session.access_token
-                self._current_session.refresh_token = response.session.refresh_token
-                self._current_session.expires_at = response.session.expires_at
+                self._sessions.pop(session.access_token)
+                session.access_token = response.session.access_token
+                session.refresh_token = response.session.refresh_token
+                session.expires_at = response.session.expires_at
+                self._cache_session(session)
                 
                 logger.info("Session refreshed successfully")
-                return self._current_session
+                return session
             
             return None
             
         except Exception as e:
             logger.error(f"Session refresh error: {e}")
-            self._current_session = None
+            if session is not None:
+                self._sessions.pop(session.access_token)
+            if session is self._current_session:
+                self._current_session = None
             return None
     
     async def reset_password(self, email: str) -> bool:
@@ -323,7 +603,7 @@ class SupabaseAuth:
             if not self.validate_email(email):
                 raise AuthError("Invalid email format")
             
-            response = self.client.auth.reset_password_email(email)
+            response = await self._run_sync(self.client.auth.reset_password_email, email)
             
             logger.info(f"Password reset email sent to {email}")
             return True
@@ -335,23 +615,24 @@ class SupabaseAuth:
             logger.error(f"Password reset error: {e}")
             return False
     
-    async def update_password(self, new_password: str) -> bool:
+    async def update_password(self, new_password: str, session: Optional[AuthSession] = None) -> bool:
         """Update user password"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 raise AuthError("No authenticated user")
             
             is_valid, password_errors = self.validate_password(new_password)
             if not is_valid:
                 raise AuthError("Password validation failed: " + "; ".join(password_errors))
             
-            response = self.client.auth.update_user({
+            response = await self._update_auth_user(session, {
                 "password": new_password
             })
             
             if response.user:
                 # Log activity
-                await self._log_activity("password_update", "auth", self._current_session.user.id)
+                await self._log_activity("password_update", "auth", session.user.id)
                 
                 logger.info("Password updated successfully")
                 return True
@@ -365,13 +646,14 @@ class SupabaseAuth:
             logger.error(f"Password update error: {e}")
             return False
     
-    async def update_profile(self, **kwargs) -> Optional[UserProfile]:
+    async def update_profile(self, session: Optional[AuthSession] = None, **kwargs) -> Optional[UserProfile]:
         """Update user profile"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 raise AuthError("No authenticated user")
             
-            user_id = self._current_session.user.id
+            user_id = session.user.id
             
             # Validate username if being updated
             if 'username' in kwargs and kwargs['username']:
@@ -393,42 +675,48 @@ class SupabaseAuth:
             if update_data:
                 update_data['updated_at'] = datetime.now().isoformat()
                 
-                response = self.client.table('profiles').update(update_data).eq('id', user_id).execute()
+                response = await self._run_sync(self.client.table('profiles').update(update_data).eq('id', user_id).execute)
                 
                 if response.data:
                     # Update current session user data
                     for field, value in update_data.items():
-                        if hasattr(self._current_session.user, field):
-                            setattr(self._current_session.user, field, value)
+                        if hasattr(session.user, field):
+                            setattr(session.user, field, value)
                     
                     # Log activity
                     await self._log_activity("profile_update", "profile", user_id, {"fields": list(update_data.keys())})
                     
                     logger.info(f"Profile updated for user {user_id}")
-                    return self._current_session.user
+                    return session.user
             
-            return self._current_session.user
+            return session.user
             
         except Exception as e:
             logger.error(f"Profile update error: {e}")
             raise AuthError(f"Failed to update profile: {str(e)}")
     
-    async def delete_account(self) -> bool:
+    async def delete_account(self, session: Optional[AuthSession] = None) -> bool:
         """Delete user account"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 raise AuthError("No authenticated user")
             
-            user_id = self._current_session.user.id
+            user_id = session.user.id
+            
+            if not self.is_service_role:
+                raise AuthError("Deleting accounts requires a service role key")
             
             # Log activity before deletion
             await self._log_activity("account_deletion", "auth", user_id)
             
             # Delete user account (this will cascade delete related data due to FK constraints)
-            response = self.client.auth.admin.delete_user(user_id)
+            response = await self._run_sync(self.client.auth.admin.delete_user, user_id)
             
-            # Clear current session
-            self._current_session = None
+            # Clear the session
+            self._sessions.pop(session.access_token)
+            if session is self._current_session:
+                self._current_session = None
             
             logger.info(f"Account deleted for user {user_id}")
             return True
@@ -445,7 +733,7 @@ class SupabaseAuth:
             if exclude_user_id:
                 query = query.neq('id', exclude_user_id)
             
-            response = query.execute()
+            response = await self._run_sync(query.execute)
             return len(response.data) > 0
             
         except Exception as e:
@@ -455,7 +743,7 @@ class SupabaseAuth:
     async def get_user_by_username(self, username: str) -> Optional[UserProfile]:
         """Get user profile by username"""
         try:
-            response = self.client.table('profiles').select('*').eq('username', username).execute()
+            response = await self._run_sync(self.client.table('profiles').select('*').eq('username', username).execute)
             
             if response.data:
                 data = response.data[0]
@@ -479,7 +767,7 @@ class SupabaseAuth:
     async def verify_email_token(self, token: str, type: str = "email") -> bool:
         """Verify email confirmation token"""
         try:
-            response = self.client.auth.verify_otp({
+            response = await self._auth_call("verify_otp", {
                 "token": token,
                 "type": type
             })
@@ -500,7 +788,7 @@ class SupabaseAuth:
             if not self.validate_email(email):
                 raise AuthError("Invalid email format")
             
-            response = self.client.auth.resend({
+            response = await self._run_sync(self.client.auth.resend, {
                 "type": "signup",
                 "email": email
             })
@@ -512,27 +800,28 @@ class SupabaseAuth:
             logger.error(f"Resend confirmation error: {e}")
             return False
     
-    async def change_email(self, new_email: str) -> bool:
+    async def change_email(self, new_email: str, session: Optional[AuthSession] = None) -> bool:
         """Change user email address"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 raise AuthError("No authenticated user")
             
             if not self.validate_email(new_email):
                 raise AuthError("Invalid email format")
             
-            response = self.client.auth.update_user({
+            response = await self._update_auth_user(session, {
                 "email": new_email
             })
             
             if response.user:
-                self._current_session.user.email = new_email
-                self._current_session.user.is_email_verified = False
+                session.user.email = new_email
+                session.user.is_email_verified = False
                 
                 # Log activity
-                await self._log_activity("email_change", "auth", self._current_session.user.id)
+                await self._log_activity("email_change", "auth", session.user.id)
                 
-                logger.info(f"Email change initiated for user {self._current_session.user.id}")
+                logger.info(f"Email change initiated for user {session.user.id}")
                 return True
             
             return False
@@ -541,13 +830,14 @@ class SupabaseAuth:
             logger.error(f"Email change error: {e}")
             raise AuthError(f"Failed to change email: {str(e)}")
     
-    async def get_user_settings(self) -> Optional[Dict[str, Any]]:
+    async def get_user_settings(self, session: Optional[AuthSession] = None) -> Optional[Dict[str, Any]]:
         """Get user settings"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 return None
             
-            response = self.client.table('user_settings').select('*').eq('user_id', self._current_session.user.id).execute()
+            response = await self._run_sync(self.client.table('user_settings').select('*').eq('user_id', session.user.id).execute)
             
             if response.data:
                 return response.data[0]
@@ -558,19 +848,21 @@ class SupabaseAuth:
             logger.error(f"Get user settings error: {e}")
             return None
     
-    async def update_user_settings(self, settings: Dict[str, Any]) -> bool:
+    async def update_user_settings(self, settings: Dict[str, Any], session: Optional[AuthSession] = None) -> bool:
         """Update user settings"""
         try:
-            if not self._current_session:
+            session = session or self._current_session
+            if not session:
                 raise AuthError("No authenticated user")
             
-            user_id = self._current_session.user.id
+            user_id = session.user.id
             settings['updated_at'] = datetime.now().isoformat()
             
-            response = self.client.table('user_settings').upsert({
+            query = self.client.table('user_settings').upsert({
                 'user_id': user_id,
                 **settings
-            }).execute()
+            })
+            response = await self._run_sync(query.execute)
             
             if response.data:
                 # Log activity
@@ -585,28 +877,30 @@ class SupabaseAuth:
             logger.error(f"Update user settings error: {e}")
             return False
     
-    async def get_session_info(self) -> Optional[Dict[str, Any]]:
+    async def get_session_info(self, session: Optional[AuthSession] = None) -> Optional[Dict[str, Any]]:
         """Get current session information"""
-        if not self._current_session:
+        session = session or self._current_session
+        if not session:
             return None
         
         return {
-            "user": asdict(self._current_session.user),
-            "expires_at": self._current_session.expires_at,
-            "token_type": self._current_session.token_type,
+            "user": asdict(session.user),
+            "expires_at": session.expires_at,
+            "token_type": session.token_type,
             "is_authenticated": True
         }
     
-    async def check_session_validity(self) -> bool:
+    async def check_session_validity(self, session: Optional[AuthSession] = None) -> bool:
         """Check if current session is still valid"""
-        if not self._current_session:
+        session = session or self._current_session
+        if not session:
             return False
         
         # Check if token is expired
         current_time = datetime.now().timestamp()
-        if current_time >= self._current_session.expires_at:
+        if current_time >= session.expires_at:
             # Try to refresh session
-            refreshed_session = await self.refresh_session()
+            refreshed_session = await self.refresh_session(session)
             return refreshed_session is not None
         
         return True
@@ -615,7 +909,7 @@ class SupabaseAuth:
     async def _get_user_profile(self, user_id: str) -> Dict[str, Any]:
         """Get user profile data from database"""
         try:
-            response = self.client.table('profiles').select('*').eq('id', user_id).execute()
+            response = await self._run_sync(self.client.table('profiles').select('*').eq('id', user_id).execute)
             
             if response.data:
                 return response.data[0]
@@ -629,9 +923,10 @@ class SupabaseAuth:
     async def _update_last_login(self, user_id: str) -> None:
         """Update user's last login timestamp"""
         try:
-            self.client.table('profiles').update({
+            query = self.client.table('profiles').update({
                 'updated_at': datetime.now().isoformat()
-            }).eq('id', user_id).execute()
+            }).eq('id', user_id)
+            await self._run_sync(query.execute)
             
         except Exception as e:
             logger.error(f"Update last login error: {e}")
@@ -647,7 +942,7 @@ class SupabaseAuth:
                 'created_at': datetime.now().isoformat()
             }
             
-            self.client.table('activity_log').insert(activity_data).execute()
+            await self._run_sync(self.client.table('activity_log').insert(activity_data).execute)
             
         except Exception as e:
             logger.error(f"Activity logging error: {e}")
@@ -661,24 +956,59 @@ class SupabaseAuth:
         if salt is None:
             salt = secrets.token_hex(16)
         
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        return password_hash.hex(), salt
+        return _pbkdf2_hex(password, salt, LEGACY_PBKDF2_ITERATIONS), salt
     
     def verify_password_hash(self, password: str, password_hash: str, salt: str) -> bool:
-        """Verify password against hash"""
+        """Verify password against a hash_password() (hash, salt) pair
+        
+        Runs PBKDF2 inline; async callers should use ``verify_and_rehash``.
+        """
         expected_hash, _ = self.hash_password(password, salt)
         return secrets.compare_digest(expected_hash, password_hash)
+    
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password off the event loop; returns an encoded hash with its parameters"""
+        return await self.password_hasher.hash(password)
+    
+    async def verify_password_async(self, password: str, encoded_hash: str) -> bool:
+        """Verify password against an encoded hash off the event loop"""
+        valid, _ = await self.password_hasher.verify(password, encoded_hash)
+        return valid
+    
+    async def verify_and_rehash(self, password: str, stored_hash: str,
+                                salt: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+        """Verify password off the event loop and report whether the stored hash needs replacing
+        
+        ``stored_hash`` is an encoded hash, or a legacy hash_password() digest
+        when ``salt`` is given. Returns (valid, new_hash); ``new_hash`` is not
+        None when the password is valid but the stored hash is weaker than the
+        current parameters, and should be stored in its place.
+        """
+        if salt is not None:
+            return await self.password_hasher.verify_legacy(password, stored_hash, salt)
+        return await self.password_hasher.verify(password, stored_hash)
 
 
 # Utility functions for use in main application
-def create_auth_manager(supabase_url: str, supabase_key: str) -> SupabaseAuth:
+def create_auth_manager(supabase_url: str, supabase_key: str, max_workers: int = 8,
+                        stateless: bool = False) -> SupabaseAuth:
     """Factory function to create auth manager instance"""
-    return SupabaseAuth(supabase_url, supabase_key)
+    return SupabaseAuth(supabase_url, supabase_key, max_workers=max_workers, stateless=stateless)
 
 def require_auth(auth_manager: SupabaseAuth):
-    """Decorator to require authentication for functions"""
+    """Decorator to require authentication for functions
+    
+    Callers pass the request's bearer token as ``access_token=``; the wrapped
+    function receives the verified session as ``session=``. Without a token
+    the manager's own signed-in session is required, as before.
+    """
     def decorator(func):
-        async def wrapper(*args, **kwargs):
+        @functools.wraps(func)
+        async def wrapper(*args, access_token: Optional[str] = None, **kwargs):
+            if access_token is not None:
+                kwargs['session'] = await auth_manager.authenticate(access_token)
+                return await func(*args, **kwargs)
+            
             if not auth_manager.is_authenticated:
                 raise AuthError("Authentication required")
             
@@ -755,4 +1085,7 @@ async def main():
         print(f"Error during testing: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if sys.argv[1:] == ["bench"]:
+        print(json.dumps(asyncio.run(benchmark_password_hasher()), indent=2))
+    else:
+        asyncio.run(main())
\ No newline at end of file
@@ -1,9 +1,157 @@
+import asyncio
+import json
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 import asyncpg
 
 DATABASE_URL = os.getenv("SUPABASE_DB_URL")
 
+logger = logging.getLogger(__name__)
+
+
+def _env_number(name: str, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+class _InstrumentedPool:
+    """ 对 asyncpg 连接池的薄封装，记录 acquire 等待时间，其余属性透传 """
+
+    def __init__(self, pool: asyncpg.Pool, manager: "PoolManager"):
+        self._pool = pool
+        self._manager = manager
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            self._manager.acquire_timeouts += 1
+            raise
+        self._manager._record_wait(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            await self._pool.release(conn)
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+class PoolManager:
+    """
+    数据库连接池管理
+    - 在应用 lifespan 中创建并预热，关闭时释放
+    - 连接池参数可通过环境变量配置
+    - 提供 acquire 等待时间、使用中/空闲连接数等指标
+    """
+
+    def __init__(self, dsn: str = DATABASE_URL):
+        self.dsn = dsn
+        self.min_size = _env_number("PG_POOL_MIN_SIZE", 2)
+        self.max_size = _env_number("PG_POOL_MAX_SIZE", 10)
+        self.max_inactive_connection_lifetime = _env_number("PG_POOL_MAX_INACTIVE_LIFETIME", 300.0, float)
+        self.command_timeout = _env_number("PG_COMMAND_TIMEOUT", 30.0, float)
+        self._pool = None
+        self._lock = asyncio.Lock()
+        self.acquire_count = 0
+        self.acquire_timeouts = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+
+    async def open(self) -> _InstrumentedPool:
+        """ 创建连接池（并发调用只会创建一次） """
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+                        command_timeout=self.command_timeout,
+                    )
+                    await self._warmup(pool)
+                    self._pool = _InstrumentedPool(pool, self)
+        return self._pool
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._pool is not None:
+                await self._pool.close()
+                self._pool = None
+
+    async def _warmup(self, pool: asyncpg.Pool) -> None:
+        """ 同时占用 min_size 个连接各执行一次查询，确保首个请求无需建连 """
+        async def ping():
+            async with pool.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+
+        await asyncio.gather(*(ping() for _ in range(self.min_size)))
+
+    def _record_wait(self, seconds: float) -> None:
+        self.acquire_count += 1
+        self.acquire_wait_total += seconds
+        self.acquire_wait_max = max(self.acquire_wait_max, seconds)
+
+    def metrics(self) -> dict:
+        data = {
+            "open": self._pool is not None,
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+            "acquire_count": self.acquire_count,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_wait_avg_ms": round(self.acquire_wait_total / self.acquire_count * 1000, 3) if self.acquire_count else 0.0,
+            "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 3),
+        }
+        if self._pool is not None:
+            size = self._pool.get_size()
+            idle = self._pool.get_idle_size()
+            data.update({"size": size, "idle": idle, "in_use": size - idle})
+        return data
+
+
+pool_manager = PoolManager()
+
+
 async def get_pg_pool():
-    if not hasattr(get_pg_pool, "pool"):
-        get_pg_pool.pool = await asyncpg.create_pool(DATABASE_URL)
-    return get_pg_pool.pool
\ No newline at end of file
+    return await pool_manager.open()
+
+
+def decode_jsonb(value):
+    """ asyncpg 默认把 json/jsonb 列作为字符串返回，这里解码；已是 Python 对象或 NULL 时原样返回 """
+    return json.loads(value) if isinstance(value, str) else value
+
+
+async def listen(channel: str, callback, on_connect=None, on_disconnect=None, reconnect_delay: float = 5.0) -> None:
+    """
+    在独立连接上 LISTEN channel（不占用连接池），断线后自动重连
+    - callback(payload) 在收到通知时调用
+    - on_connect() 在每次（重新）建立监听后调用；断线期间可能漏掉通知，调用方应在此重新同步状态
+    - on_disconnect() 在监听连接断开或建立失败后调用
+    - 直到任务被取消才返回
+    """
+    while True:
+        conn = None
+        try:
+            conn = await asyncpg.connect(pool_manager.dsn)
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _: closed.set())
+            await conn.add_listener(channel, lambda _conn, _pid, _channel, payload: callback(payload))
+            if on_connect is not None:
+                on_connect()
+            await closed.wait()
+            logger.warning("监听 %s 的连接已断开，准备重连", channel)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("监听 %s 失败: %s", channel, e)
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+            if on_disconnect is not None:
+                on_disconnect()
+        await asyncio.sleep(reconnect_delay)
@@ -1,11 +1,72 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from backend.db import pool_manager
+from backend.middlewares.rate_limiter import rate_limiter
+from backend.platform_api.base import PlatformBase
 from backend.routers import developer, user, account_import_export, logs
+from backend.services.automation_scheduler import automation_scheduler
+from backend.services.developer_keys import developer_key_cache
+from backend.services.log_rollup import backfill_system_log_rollups
+from backend.services.log_sink import LOG_SINKS
+from backend.services.partitions import maintain_partitions, run_partition_maintenance
+from backend.services.post_dispatcher import post_dispatcher
+from backend.services.quota import quota_meter
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动时创建并预热连接池，避免首个请求承担建连延迟
+    pool = await pool_manager.open()
+    # 先确保日志分区存在，再开始写入
+    await maintain_partitions()
+    # 汇总表为空时从已有的 system_logs 回填，否则 /api/logs/stats 在部署后看不到历史数据
+    async with pool.acquire() as conn:
+        await backfill_system_log_rollups(conn)
+    partition_task = asyncio.create_task(run_partition_maintenance())
+    for sink in LOG_SINKS:
+        sink.start()
+    developer_key_cache.start()
+    quota_meter.start()
+    # 定时帖子分发也可以作为独立进程运行: python -m backend.services.post_dispatcher
+    if os.getenv("POST_DISPATCHER_ENABLED", "").lower() in ("1", "true", "yes"):
+        post_dispatcher.start()
+    if os.getenv("AUTOMATION_SCHEDULER_ENABLED", "").lower() in ("1", "true", "yes"):
+        automation_scheduler.start()
+    yield
+    await automation_scheduler.stop()
+    await post_dispatcher.stop()
+    partition_task.cancel()
+    try:
+        await partition_task
+    except asyncio.CancelledError:
+        pass
+    await developer_key_cache.stop()
+    # 写入尚未落库的配额用量
+    await quota_meter.stop()
+    await PlatformBase.aclose_clients()
+    # 关闭前写入队列中剩余的日志，再关闭连接池
+    for sink in LOG_SINKS:
+        await sink.stop()
+    await pool_manager.close()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+app.middleware("http")(rate_limiter)
 app.include_router(developer.router)
 app.include_router(user.router)
 app.include_router(account_import_export.router)
 app.include_router(logs.router)
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "db_pool": pool_manager.metrics(),
+        "log_sinks": {sink.table: sink.snapshot() for sink in LOG_SINKS},
+        "developer_key_cache": developer_key_cache.snapshot(),
+        "quota": quota_meter.snapshot(),
+        "post_dispatcher": post_dispatcher.snapshot(),
+        "automation_scheduler": automation_scheduler.snapshot(),
+    }
 from security import SecurityManager
 from tenant import TenantService
 
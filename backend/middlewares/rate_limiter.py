@@ -1,9 +1,232 @@
 # backend/middlewares/rate_limiter.py
-from fastapi import Request
+import hashlib
+import ipaddress
+import logging
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from backend.utils.auth import verify_access_token
+
+logger = logging.getLogger(__name__)
+
+# (桶键, 每秒补充的令牌数, 桶容量)
+BucketLimit = Tuple[str, float, float]
+
+
+def _parse_limit(value: str) -> Tuple[float, float]:
+    """ "60/60" 表示每 60 秒 60 次，桶容量等于次数 """
+    count_text, _, seconds_text = value.partition("/")
+    count, seconds = float(count_text), float(seconds_text or 60)
+    # 次数或窗口为 0 时补充速率为 0，计算重试时间会除以零
+    if not (count > 0 and seconds > 0):
+        raise ValueError(f"无效的限流配置 '{value}'，次数和秒数都必须大于 0")
+    return count / seconds, count
+
+
+LIMIT_PER_IP = _parse_limit(os.getenv("RATE_LIMIT_PER_IP", "60/60"))
+LIMIT_PER_DEVELOPER_KEY = _parse_limit(os.getenv("RATE_LIMIT_PER_DEVELOPER_KEY", "600/60"))
+LIMIT_PER_TENANT = _parse_limit(os.getenv("RATE_LIMIT_PER_TENANT", "1200/60"))
+
+# 只有来自这些地址的连接才信任 X-Forwarded-For（默认回环与私有网段，即同一内网中的负载均衡器）
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in os.getenv(
+        "RATE_LIMIT_TRUSTED_PROXIES",
+        "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16,fc00::/7",
+    ).split(",")
+    if item.strip()
+]
+
+
+class MemoryBackend:
+    """
+    进程内令牌桶
+    - 每个桶只存 [令牌数, 上次更新时间]，请求到达时按经过的时间补充令牌，无需后台任务
+    - 桶数超过 max_buckets 时淘汰最久未使用的桶（被淘汰的桶下次以满桶重建）
+    - 只在单个进程内生效，多进程部署请使用 RedisBackend
+    """
+
+    def __init__(self, max_buckets: int = 100000):
+        self.max_buckets = max_buckets
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def take(self, limits: List[BucketLimit], cost: float = 1.0) -> Tuple[bool, float]:
+        """ 所有桶都有足够令牌时才一起扣减，返回 (是否放行, 建议重试秒数) """
+        now = time.monotonic()
+        buckets = self._buckets
+        states = []
+        retry_after = 0.0
+        for key, rate, burst in limits:
+            state = buckets.get(key)
+            if state is None:
+                state = buckets[key] = [burst, now]
+                if len(buckets) > self.max_buckets:
+                    buckets.popitem(last=False)
+            else:
+                buckets.move_to_end(key)
+                state[0] = min(burst, state[0] + (now - state[1]) * rate)
+                state[1] = now
+            if state[0] < cost:
+                retry_after = max(retry_after, (cost - state[0]) / rate)
+            states.append(state)
+        if retry_after:
+            return False, retry_after
+        for state in states:
+            state[0] -= cost
+        return True, 0.0
+
+
+# 与 MemoryBackend.take 相同的算法；时间取 Redis 服务器时间，各进程共享同一时钟
+_TOKEN_BUCKET_LUA = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local cost = tonumber(ARGV[1])
+local retry = 0
+local tokens = {}
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local state = redis.call('HMGET', key, 't', 'ts')
+    local t = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    t = math.min(burst, t + math.max(0, now - ts) * rate)
+    tokens[i] = t
+    if t < cost then
+        retry = math.max(retry, (cost - t) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local rate = tonumber(ARGV[i * 2])
+    local burst = tonumber(ARGV[i * 2 + 1])
+    local t = tokens[i]
+    if retry == 0 then
+        t = t - cost
+    end
+    redis.call('HSET', key, 't', t, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(burst / rate) + 1)
+end
+if retry == 0 then
+    return {1, '0'}
+end
+return {0, tostring(retry)}
+"""
+
+
+class RedisBackend:
+    """
+    基于 Redis（或兼容实现）的共享令牌桶，所有进程看到同一份限额
+    - 一次请求的所有桶在同一个 Lua 脚本中原子地检查和扣减，只需一次往返
+    - 桶在闲置到可以补满后自动过期
+    - 使用 Redis Cluster 时各桶键需落在同一 slot
+    """
+
+    def __init__(self, url: Optional[str] = None, prefix: str = "ratelimit:", client=None):
+        if client is None:
+            try:
+                from redis import asyncio as redis_asyncio
+            except ImportError:
+                raise ImportError("RATE_LIMIT_REDIS_URL requires redis. Install with: pip install redis")
+            client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+        self._client = client
+        self._script = self._client.register_script(_TOKEN_BUCKET_LUA)
+
+    async def take(self, limits: List[BucketLimit], cost: float = 1.0) -> Tuple[bool, float]:
+        args = [cost]
+        for _, rate, burst in limits:
+            args.extend((rate, burst))
+        allowed, retry_after = await self._script(keys=[self.prefix + key for key, _, _ in limits], args=args)
+        return bool(allowed), float(retry_after)
+
+
+def create_backend():
+    redis_url = os.getenv("RATE_LIMIT_REDIS_URL")
+    return RedisBackend(redis_url) if redis_url else MemoryBackend()
+
+
+limiter_backend = create_backend()
+
+
+def _hash(value: str) -> str:
+    # 开发者 key 不以明文出现在限流存储中
+    return hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+def _trusted(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """
+    客户端 IP
+    - 直连地址是受信任的代理时，从右往左跳过 X-Forwarded-For 中受信任的代理，取第一个其他地址
+    - 最左侧的地址由客户端随意填写，只有整条链都是受信任代理时才会被采用
+    """
+    peer = request.client.host if request.client else "unknown"
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or not _trusted(peer):
+        return peer
+    for address in reversed(forwarded.split(",")):
+        address = address.strip()
+        if not _trusted(address):
+            try:
+                return str(ipaddress.ip_address(address))
+            except ValueError:
+                return peer
+    return peer
+
+
+async def verified_tenant(request: Request) -> Optional[str]:
+    """
+    从已验证的访问令牌中取租户（app_metadata.tenant_id 或 tenant_id 声明）
+    - 不信任 x-tenant-id 等请求头，否则匿名请求可以耗尽任意租户的限额
+    - 没有令牌、令牌无效或没有租户声明时返回 None，此时不按租户限流（令牌无效由后续认证拒绝）
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        claims = await verify_access_token(token)
+    except HTTPException:
+        return None
+    tenant_id = (claims.get("app_metadata") or {}).get("tenant_id") or claims.get("tenant_id")
+    return str(tenant_id) if tenant_id else None
+
+
+async def bucket_limits(request: Request) -> List[BucketLimit]:
+    limits = [("ip:" + client_ip(request), *LIMIT_PER_IP)]
+    developer_key: Optional[str] = request.headers.get("developer-api-key")
+    if developer_key:
+        limits.append(("dev:" + _hash(developer_key), *LIMIT_PER_DEVELOPER_KEY))
+    tenant_id = await verified_tenant(request)
+    if tenant_id:
+        # 与开发者 key 一样取哈希，存储键长度固定
+        limits.append(("tenant:" + _hash(tenant_id), *LIMIT_PER_TENANT))
+    return limits
+
 
 async def rate_limiter(request: Request, call_next):
-    # 60次/分钟限流
-    client_ip = request.client.host
-    if request.app.state.requests.get(client_ip, 0) > 60:
-        return JSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+    # 按 IP / 开发者 key / 租户三个维度限流，任一维度超限即拒绝
+    try:
+        allowed, retry_after = await limiter_backend.take(await bucket_limits(request))
+    except Exception as e:
+        # 共享存储不可用时放行，避免限流故障拖垮整个服务
+        logger.error("限流检查失败: %s", e)
+        return await call_next(request)
+    if not allowed:
+        return JSONResponse(
+            {"error": "Rate limit exceeded"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
     return await call_next(request)
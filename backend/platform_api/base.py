@@ -1,7 +1,128 @@
+import asyncio
+import os
+from typing import Any, ClassVar, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+# 每个平台一个连接池；一个平台只访问一个 API 域名，所以这也是单域名的连接上限
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=int(_env_float("PLATFORM_MAX_CONNECTIONS", 100)),
+    max_keepalive_connections=int(_env_float("PLATFORM_MAX_KEEPALIVE", 20)),
+    keepalive_expiry=30.0,
+)
+DEFAULT_TIMEOUT = httpx.Timeout(_env_float("PLATFORM_HTTP_TIMEOUT", 10.0), connect=5.0)
+
+
+class PlatformError(Exception):
+    """ 平台接口调用失败；retryable 表示超时、限流或服务端错误，可稍后重试 """
+
+    def __init__(self, platform: str, message: str, status_code: Optional[int] = None, retryable: bool = False):
+        super().__init__(f"{platform}: {message}")
+        self.platform = platform
+        self.status_code = status_code
+        self.retryable = retryable
+
+
 class PlatformBase:
-    def publish(self, content):
+    """
+    平台适配器基类（异步）
+    - 同一平台的所有实例共享一个长连接 httpx.AsyncClient
+    - base_url 可通过 env_base_url 指定的环境变量覆盖（例如指向本地 mock 服务）
+    - content 使用 Content 模型的字段（title / text_content / media_urls），
+      account 为目标账号（account_id / access_token）
+    """
+
+    name: ClassVar[str] = "base"
+    base_url: ClassVar[str] = ""
+    env_base_url: ClassVar[Optional[str]] = None
+    limits: ClassVar[httpx.Limits] = DEFAULT_LIMITS
+    timeout: ClassVar[httpx.Timeout] = DEFAULT_TIMEOUT
+    # 测试时可注入 httpx.MockTransport 等，见 configure_transport
+    transport: ClassVar[Optional[httpx.AsyncBaseTransport]] = None
+
+    _clients: ClassVar[Dict[str, httpx.AsyncClient]] = {}
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        client = PlatformBase._clients.get(cls.name)
+        if client is None or client.is_closed:
+            base_url = os.getenv(cls.env_base_url, cls.base_url) if cls.env_base_url else cls.base_url
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                limits=cls.limits,
+                timeout=cls.timeout,
+                transport=PlatformBase.transport,
+            )
+            PlatformBase._clients[cls.name] = client
+        return client
+
+    @classmethod
+    async def configure_transport(cls, transport: Optional[httpx.AsyncBaseTransport]) -> None:
+        """ 替换所有平台使用的 transport，已创建的客户端会被关闭并重建 """
+        await cls.aclose_clients()
+        PlatformBase.transport = transport
+
+    @classmethod
+    async def aclose_clients(cls) -> None:
+        clients = list(PlatformBase._clients.values())
+        PlatformBase._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients))
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """ 发送请求并返回 JSON；网络错误、非 2xx 响应和无法解析的响应体统一转换为 PlatformError """
+        try:
+            response = await self.client().request(method, path, **kwargs)
+        except httpx.TimeoutException as e:
+            raise PlatformError(self.name, f"请求超时: {e}", retryable=True)
+        except httpx.HTTPError as e:
+            raise PlatformError(self.name, f"请求失败: {e}", retryable=True)
+        if response.status_code >= 400:
+            raise PlatformError(
+                self.name,
+                f"HTTP {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retryable=response.status_code == 429 or response.status_code >= 500,
+            )
+        if not response.content:
+            return {}
+        try:
+            return response.json()
+        except ValueError as e:
+            # 2xx 但响应体不是 JSON（例如网关返回的 HTML）；请求可能已生效，不重试以免重复发布
+            raise PlatformError(
+                self.name,
+                f"无法解析响应 (HTTP {response.status_code}): {e}",
+                status_code=response.status_code,
+            )
+
+    async def publish(self, content: Dict[str, Any], account: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         raise NotImplementedError
-    def get_accounts(self):
+
+    async def get_accounts(self, account: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         return []
-    def test(self):
-        return "Base platform test success"
\ No newline at end of file
+
+    async def publish_batch(
+        self,
+        items: Sequence[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+        concurrency: int = 10,
+    ) -> List[Dict[str, Any]]:
+        """ 并发发布多条 (content, account)，结果与输入顺序一致，单条失败不影响其他 """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(content, account):
+            async with semaphore:
+                try:
+                    return {"success": True, "result": await self.publish(content, account)}
+                except PlatformError as e:
+                    return {"success": False, "error": str(e), "retryable": e.retryable}
+
+        return await asyncio.gather(*(run(content, account) for content, account in items))
+
+    async def test(self):
+        return "Base platform test success"
@@ -1,6 +1,27 @@
 from .base import PlatformBase
 class FacebookPlatform(PlatformBase):
-    def publish(self, content):
-        return f"Facebook发布：{content}"
-    def test(self):
-        return "Facebook平台测试成功"
\ No newline at end of file
+    name = "facebook"
+    base_url = "https://graph.facebook.com/v19.0"
+    env_base_url = "FACEBOOK_API_BASE_URL"
+
+    async def publish(self, content, account=None):
+        account = account or {}
+        data = {"message": content.get("text_content") or content.get("title") or ""}
+        if content.get("media_urls"):
+            data["link"] = content["media_urls"][0]
+        result = await self._request(
+            "POST",
+            f"/{account.get('account_id') or 'me'}/feed",
+            data=data,
+            params={"access_token": account.get("access_token")},
+        )
+        return {"platform": self.name, "post_id": result.get("id")}
+
+    async def get_accounts(self, account=None):
+        if not account:
+            return []
+        result = await self._request("GET", "/me/accounts", params={"access_token": account.get("access_token")})
+        return [{"id": page["id"], "nickname": page.get("name")} for page in result.get("data", [])]
+
+    async def test(self):
+        return "Facebook平台测试成功"
@@ -1,9 +1,39 @@
 from .base import PlatformBase
 
 class TikTokPlatform(PlatformBase):
-    def publish(self, content):
-        return f"TikTok发布：{content}"
-    def test(self):
+    name = "tiktok"
+    base_url = "https://open.tiktokapis.com"
+    env_base_url = "TIKTOK_API_BASE_URL"
+
+    @staticmethod
+    def _headers(account):
+        return {"Authorization": f"Bearer {(account or {}).get('access_token')}"}
+
+    async def publish(self, content, account=None):
+        result = await self._request(
+            "POST",
+            "/v2/post/publish/content/init/",
+            headers=self._headers(account),
+            json={
+                "post_info": {
+                    "title": content.get("title") or "",
+                    "description": content.get("text_content") or "",
+                },
+                "source_info": {"source": "PULL_FROM_URL", "photo_images": content.get("media_urls") or []},
+                "post_mode": "DIRECT_POST",
+                "media_type": "PHOTO",
+            },
+        )
+        return {"platform": self.name, "post_id": result.get("data", {}).get("publish_id")}
+
+    async def test(self):
         return "TikTok平台测试成功"
-    def get_accounts(self):
-        return [{"id": "tiktok001", "nickname": "小Tik"}]
\ No newline at end of file
+
+    async def get_accounts(self, account=None):
+        if not account:
+            return []
+        result = await self._request(
+            "GET", "/v2/user/info/", headers=self._headers(account), params={"fields": "open_id,display_name"}
+        )
+        user = result.get("data", {}).get("user", {})
+        return [{"id": user.get("open_id"), "nickname": user.get("display_name")}]
@@ -1,6 +1,31 @@
-from .base import PlatformBase
+from .base import PlatformBase, PlatformError
 class WechatPlatform(PlatformBase):
-    def publish(self, content):
-        return f"Wechat发布：{content}"
-    def test(self):
-        return "Wechat平台测试成功"
\ No newline at end of file
+    name = "wechat"
+    base_url = "https://api.weixin.qq.com"
+    env_base_url = "WECHAT_API_BASE_URL"
+
+    async def _call(self, path, account, payload):
+        # 微信接口出错时仍返回 HTTP 200，错误在 errcode 中
+        result = await self._request(
+            "POST", path, params={"access_token": (account or {}).get("access_token")}, json=payload
+        )
+        if result.get("errcode"):
+            # -1: 系统繁忙; 45009: 调用频率超限
+            raise PlatformError(self.name, f"{result.get('errcode')}: {result.get('errmsg')}",
+                                retryable=result.get("errcode") in (-1, 45009))
+        return result
+
+    async def publish(self, content, account=None):
+        # 先创建草稿，再提交发布
+        draft = await self._call("/cgi-bin/draft/add", account, {
+            "articles": [{
+                "title": content.get("title") or "",
+                "content": content.get("text_content") or "",
+                "thumb_media_id": content.get("thumb_media_id"),
+            }]
+        })
+        result = await self._call("/cgi-bin/freepublish/submit", account, {"media_id": draft.get("media_id")})
+        return {"platform": self.name, "post_id": result.get("publish_id")}
+
+    async def test(self):
+        return "Wechat平台测试成功"
@@ -1,35 +1,35 @@
-from fastapi import APIRouter, UploadFile, File, Response
-import csv
-import io
+from fastapi import APIRouter, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from backend.db import get_pg_pool
+from backend.utils.csv_stream import iter_csv_batches
+from backend.utils.export_stream import MEDIA_TYPES, stream_query
 
 router = APIRouter(prefix="/api/accounts", tags=["accounts"])
 
 @router.post("/import")
 async def import_accounts(file: UploadFile = File(...)):
-    content = await file.read()
-    decoded = content.decode()
-    reader = csv.DictReader(io.StringIO(decoded))
     pool = await get_pg_pool()
     async with pool.acquire() as conn:
         count = 0
         async with conn.transaction():
-            for row in reader:
-                await conn.execute(
-                    "INSERT INTO accounts (username, platform) VALUES ($1, $2)",
-                    row["username"], row["platform"]
+            async for rows in iter_csv_batches(file):
+                await conn.copy_records_to_table(
+                    "accounts",
+                    records=[(row["username"], row["platform"]) for row in rows],
+                    columns=["username", "platform"]
                 )
-                count += 1
+                count += len(rows)
     return {"count": count}
 
 @router.get("/export")
-async def export_accounts():
+async def export_accounts(format: str = Query("csv", pattern="^(csv|ndjson)$")):
     pool = await get_pg_pool()
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT id, username, platform FROM accounts")
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=["id", "username", "platform"])
-    writer.writeheader()
-    for acc in rows:
-        writer.writerow(dict(acc))
-    return Response(content=output.getvalue(), media_type="text/csv")
\ No newline at end of file
+    return StreamingResponse(
+        stream_query(
+            pool,
+            "SELECT id, username, platform FROM accounts",
+            fieldnames=["id", "username", "platform"],
+            fmt=format
+        ),
+        media_type=MEDIA_TYPES[format]
+    )
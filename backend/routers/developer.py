@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
 from backend.utils.auth import get_current_user
 from backend.db import get_pg_pool
+from backend.services.publisher import load_targets, publisher
 
 router = APIRouter(prefix="/api/developer", tags=["developer"])
 
@@ -58,8 +59,29 @@ async def del_webhook(webhook_id: int, user=Depends(require_developer)):
     return {"success": True}
 
 @router.post("/test-publish")
-async def test_publish(user=Depends(require_developer)):
-    return {"result": "所有平台已测试"}
+async def test_publish(data: dict = Body(default={}), user=Depends(require_developer)):
+    # 提供 content 和 targets（或 account_ids）时并发发布到所有目标，否则只做各平台连通性测试
+    # account_ids 只能是当前用户自己的账号，无效或无权访问的账号作为失败结果返回
+    targets = data.get("targets") or []
+    failures = []
+    account_ids = data.get("account_ids")
+    if account_ids:
+        if not isinstance(account_ids, list):
+            raise HTTPException(status_code=400, detail="account_ids 必须是数组")
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            loaded, failures = await load_targets(conn, account_ids, user.id)
+        targets = targets + loaded
+    if not targets and not failures:
+        return {"result": "所有平台已测试", "platforms": await publisher.test_all()}
+
+    results = await publisher.publish(data.get("content") or {}, targets) + failures
+    return {
+        "result": "发布完成",
+        "success_count": sum(1 for result in results if result["success"]),
+        "failed_count": sum(1 for result in results if not result["success"]),
+        "results": results,
+    }
 
 @router.get("/sdks")
 async def list_sdks(user=Depends(require_developer)):
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Body
+from fastapi import APIRouter, Body, HTTPException
 from datetime import datetime
 from backend.db import get_pg_pool
+from backend.services.log_sink import app_log_sink
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
@@ -13,10 +14,7 @@ async def list_logs():
 
 @router.post("/")
 async def add_log(log: dict = Body(...)):
-    pool = await get_pg_pool()
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow(
-            "INSERT INTO logs (message, timestamp) VALUES ($1, $2) RETURNING *",
-            log["message"], datetime.utcnow()
-        )
-        return dict(row)
\ No newline at end of file
+    timestamp = datetime.utcnow()
+    if not await app_log_sink.emit_wait((log["message"], timestamp)):
+        raise HTTPException(status_code=503, detail="日志队列已满，请稍后重试")
+    return {"message": log["message"], "timestamp": timestamp, "queued": True}
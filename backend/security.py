@@ -1,14 +1,63 @@
-from cryptography.fernet import Fernet
-import base64
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
+from functools import lru_cache
+from typing import Iterable, List, Optional
 import os
 
-class SecurityManager:
-    def __init__(self):
-        self.key = base64.urlsafe_b64encode(os.urandom(32))
-        self.cipher = Fernet(self.key)
-    
-    def encrypt(self, text: str) -> str:
-        return self.cipher.encrypt(text.encode()).decode()
-    
-    def decrypt(self, encrypted_text: str) -> str:
-        return self.cipher.decrypt(encrypted_text.encode()).decode()
+from backend.core.security import Security
+
+def load_encryption_keys() -> List[str]:
+    """
+    读取密钥环，第一个为当前主密钥（用于加密），其余为仅用于解密的旧密钥
+    - ENCRYPTION_KEYS: 逗号分隔
+    - ENCRYPTION_KEYS_FILE: 每行一个，# 开头为注释
+    - 都未配置时使用 SECRET_KEY
+    """
+    raw = os.getenv("ENCRYPTION_KEYS")
+    if raw:
+        keys = raw.split(",")
+    elif os.getenv("ENCRYPTION_KEYS_FILE"):
+        with open(os.environ["ENCRYPTION_KEYS_FILE"]) as f:
+            keys = [line for line in f if not line.lstrip().startswith("#")]
+    else:
+        keys = [os.getenv("SECRET_KEY") or ""]
+    keys = [key.strip() for key in keys if key.strip()]
+    if not keys:
+        raise RuntimeError("未配置加密密钥，请设置 ENCRYPTION_KEYS、ENCRYPTION_KEYS_FILE 或 SECRET_KEY")
+    return keys
+
+class SecurityManager(Security):
+    """
+    基于 MultiFernet 的密钥环
+    - 所有进程从同一配置加载密钥，互相可以解密
+    - 轮换时把新密钥放在最前面：新数据用新密钥加密，旧数据仍可解密，再由后台任务逐批重新加密
+    """
+
+    def __init__(self, keys: Optional[List[str]] = None):
+        self.keys = keys or load_encryption_keys()
+        self.key = self.keys[0]
+        self.primary = Fernet(self.key)
+        self.cipher = MultiFernet([self.primary] + [Fernet(key) for key in self.keys[1:]])
+
+    def needs_rotation(self, token: str) -> bool:
+        """ 密文不是用当前主密钥加密的 """
+        try:
+            self.primary.decrypt(token.encode())
+            return False
+        except InvalidToken:
+            return True
+
+    def rotate(self, token: str) -> str:
+        """ 用主密钥重新加密；任何密钥都无法解密时抛出 InvalidToken """
+        return self.cipher.rotate(token.encode()).decode()
+
+    def rotate_many(self, tokens: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """ 只重新加密需要轮换的密文，已是主密钥加密的原样返回 """
+        return [
+            self.rotate(token) if token is not None and self.needs_rotation(token) else token
+            for token in tokens
+        ]
+
+@lru_cache(maxsize=None)
+def get_security_manager() -> SecurityManager:
+    """ 首次使用时才加载密钥，导入模块时不需要密钥配置 """
+    return SecurityManager()
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from backend.db import decode_jsonb, get_pg_pool
+from backend.utils.cron import next_run_time
+
+logger = logging.getLogger(__name__)
+
+# 走 idx_automation_tasks_due 索引，只读取已到期的任务，不逐个计算 cron
+CLAIM_SQL = """
+SELECT task_id, task_name, task_type, platform, user_account, config, cron_expression, next_run_time
+FROM automation_tasks
+WHERE is_active = true AND next_run_time <= NOW() AND task_type = ANY($2::text[])
+ORDER BY next_run_time
+LIMIT $1
+FOR UPDATE SKIP LOCKED
+"""
+
+ADVANCE_SQL = """
+UPDATE automation_tasks t
+SET next_run_time = v.next_run_time, last_run_time = $3, status = 'running',
+    run_count = t.run_count + 1, updated_at = NOW()
+FROM unnest($1::bigint[], $2::timestamptz[]) AS v(task_id, next_run_time)
+WHERE t.task_id = v.task_id
+"""
+
+COMPLETE_SQL = """
+UPDATE automation_tasks t
+SET status = v.status, error_message = v.error_message,
+    success_count = t.success_count + (v.status = 'completed')::int, updated_at = NOW()
+FROM unnest($1::bigint[], $2::text[], $3::text[]) AS v(task_id, status, error_message)
+WHERE t.task_id = v.task_id
+"""
+
+# 新建或修改了 cron 但还没有计算 next_run_time 的任务
+UNSCHEDULED_SQL = """
+SELECT task_id, cron_expression FROM automation_tasks
+WHERE is_active = true AND next_run_time IS NULL AND cron_expression IS NOT NULL
+AND task_id > $1
+ORDER BY task_id
+LIMIT $2
+"""
+
+SCHEDULE_SQL = """
+UPDATE automation_tasks t
+SET next_run_time = v.next_run_time
+FROM unnest($1::bigint[], $2::timestamptz[]) AS v(task_id, next_run_time)
+WHERE t.task_id = v.task_id AND t.next_run_time IS NULL
+"""
+
+# 无法计算触发时间的任务停用并记录原因，否则每次轮询都会被重新选中；修正 cron 后重新启用即可
+DISABLE_SQL = """
+UPDATE automation_tasks t
+SET is_active = false, status = 'failed', error_message = v.error_message, updated_at = NOW()
+FROM unnest($1::bigint[], $2::text[]) AS v(task_id, error_message)
+WHERE t.task_id = v.task_id AND t.next_run_time IS NULL
+"""
+
+TaskHandler = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+def _first_run(expression: str, now: datetime) -> Tuple[Optional[datetime], Optional[str]]:
+    """ 返回 (首次触发时间, 无法调度的原因) """
+    try:
+        next_run = next_run_time(expression, now)
+    except ValueError as e:
+        return None, f"无效的cron表达式 {expression!r}: {e}"
+    if next_run is None:
+        return None, f"cron表达式 {expression!r} 在可查找的时间范围内不会触发"
+    return next_run, None
+
+
+def _next_run(expression: Optional[str], now: datetime) -> Optional[datetime]:
+    try:
+        return next_run_time(expression, now)
+    except ValueError as e:
+        # 绕过模型校验写入的无效表达式：不再调度，等待修正
+        logger.warning("无效的cron表达式 %r: %s", expression, e)
+        return None
+
+
+class AutomationScheduler:
+    """
+    自动化任务 cron 调度
+    - cron 表达式只在计算下一次触发时间时使用（解析结果有缓存），结果存入 next_run_time
+    - 每次轮询只是一次 (is_active, next_run_time) 索引范围查询，任务总数再多也只读取到期的部分
+    - 认领时在同一事务内推进 next_run_time，多个进程用 FOR UPDATE SKIP LOCKED 互不重复
+    - 下一次时间从当前时间算起，停机期间错过的多次触发只补执行一次
+    - 执行时间超过周期的任务可能与下一次触发重叠，与 cron 行为一致
+    """
+
+    def __init__(self, batch_size: int = 100, poll_interval: float = 1.0, concurrency: int = 20):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.concurrency = concurrency
+        self.handlers: Dict[str, TaskHandler] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._inflight: Set[asyncio.Task] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {"claimed": 0, "completed": 0, "failed": 0, "scheduled": 0, "disabled": 0, "errors": 0}
+
+    def register(self, task_type: str) -> Callable[[TaskHandler], TaskHandler]:
+        """ 按 task_type 注册处理函数，处理函数接收任务字典，抛出异常即视为失败 """
+        def decorator(handler: TaskHandler) -> TaskHandler:
+            self.handlers[task_type] = handler
+            return handler
+        return decorator
+
+    async def schedule_pending(self) -> int:
+        """ 为 next_run_time 为空的任务计算首次触发时间，返回更新的数量；表达式无效的任务被停用 """
+        total, last_id = 0, 0
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            while True:
+                rows = await conn.fetch(UNSCHEDULED_SQL, last_id, self.batch_size)
+                if not rows:
+                    break
+                last_id = rows[-1]["task_id"]
+                now = datetime.now(timezone.utc)
+                scheduled, invalid = [], []
+                for row in rows:
+                    next_run, error = _first_run(row["cron_expression"], now)
+                    if error:
+                        invalid.append((row["task_id"], error))
+                    else:
+                        scheduled.append((row["task_id"], next_run))
+                if scheduled:
+                    await conn.execute(SCHEDULE_SQL, *[list(column) for column in zip(*scheduled)])
+                    total += len(scheduled)
+                if invalid:
+                    logger.warning("停用 %d 个无法调度的自动化任务: %s", len(invalid), invalid)
+                    await conn.execute(DISABLE_SQL, *[list(column) for column in zip(*invalid)])
+                    self.stats["disabled"] += len(invalid)
+        self.stats["scheduled"] += total
+        return total
+
+    async def claim(self) -> List[Dict[str, Any]]:
+        """
+        认领一批到期任务并推进 next_run_time（没有 cron 的一次性任务置为 NULL）
+        只认领本进程注册了处理函数的 task_type，其他类型留给注册了它的进程
+        """
+        if not self.handlers:
+            return []
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(CLAIM_SQL, self.batch_size, list(self.handlers))
+                if not rows:
+                    return []
+                now = datetime.now(timezone.utc)
+                await conn.execute(
+                    ADVANCE_SQL,
+                    [row["task_id"] for row in rows],
+                    [_next_run(row["cron_expression"], now) for row in rows],
+                    now,
+                )
+        self.stats["claimed"] += len(rows)
+        return [{**dict(row), "config": decode_jsonb(row["config"]) or {}} for row in rows]
+
+    async def execute(self, task: Dict[str, Any]) -> tuple:
+        """ 返回 (task_id, status, error_message) """
+        handler = self.handlers.get(task["task_type"])
+        if handler is None:
+            self.stats["failed"] += 1
+            return task["task_id"], "failed", f"未注册的任务类型: {task['task_type']}"
+        try:
+            async with self._semaphore:
+                await handler(task)
+        except Exception as e:
+            logger.exception("自动化任务 %s 执行失败", task["task_id"])
+            self.stats["failed"] += 1
+            return task["task_id"], "failed", str(e)[:2000]
+        self.stats["completed"] += 1
+        return task["task_id"], "completed", None
+
+    async def complete(self, outcomes: List[tuple]) -> None:
+        if not outcomes:
+            return
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            await conn.execute(COMPLETE_SQL, *[list(column) for column in zip(*outcomes)])
+
+    async def run_batch(self, tasks: List[Dict[str, Any]]) -> None:
+        try:
+            outcomes = await asyncio.gather(*(self.execute(task) for task in tasks))
+            await self.complete(outcomes)
+        except Exception as e:
+            # 状态停留在 running；next_run_time 已推进，不影响后续调度
+            self.stats["errors"] += 1
+            logger.error("自动化任务结果写回失败: %s", e)
+
+    async def tick(self) -> int:
+        """ 认领并启动一批到期任务（不等待执行完成），返回认领数量 """
+        tasks = await self.claim()
+        if tasks:
+            batch = asyncio.create_task(self.run_batch(tasks))
+            self._inflight.add(batch)
+            batch.add_done_callback(self._inflight.discard)
+        return len(tasks)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """ 等待正在执行的任务结束，超时则取消 """
+        if self._task is None:
+            return
+        self._stopping = True
+        tasks = [self._task, *self._inflight]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            claimed = 0
+            try:
+                # 走 idx_automation_tasks_unscheduled 部分索引，没有待计算的任务时开销很小，
+                # 新建或修改 cron 的任务最多延迟一个轮询间隔
+                await self.schedule_pending()
+                claimed = await self.tick()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error("自动化任务调度失败: %s", e)
+            # 一批取满说明还有积压，立即继续
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "inflight_batches": len(self._inflight),
+            "handlers": sorted(self.handlers),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+automation_scheduler = AutomationScheduler(
+    batch_size=int(os.getenv("AUTOMATION_BATCH_SIZE", "100")),
+    poll_interval=float(os.getenv("AUTOMATION_POLL_INTERVAL", "1")),
+)
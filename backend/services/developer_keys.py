@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+from typing import Optional
+
+from backend.db import get_pg_pool, listen
+from backend.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# developer_settings 上的触发器在开发者 key 变更时向该频道发送 key 的 sha256
+CHANNEL = "developer_keys"
+
+_MISSING = object()
+
+
+def hash_key(developer_key: str) -> str:
+    return hashlib.sha256(developer_key.encode()).hexdigest()
+
+
+class DeveloperKeyCache:
+    """
+    开发者 key -> user_id 的进程内缓存
+    - 以 key 的 sha256 作为缓存键，内存中不保留明文 key
+    - 无效 key 也缓存（较短的 TTL），避免用错误 key 反复打到数据库
+    - 通过 LISTEN/NOTIFY 接收其他进程的变更通知；监听连接断开期间可能漏掉通知，重连后清空缓存
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0, negative_ttl: float = 30.0, reconnect_delay: float = 5.0):
+        self.negative_ttl = negative_ttl
+        self.reconnect_delay = reconnect_delay
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        # 每次失效加一；查询期间发生过失效则不缓存查询结果，避免写回旧数据
+        self._generation = 0
+        self._task: Optional[asyncio.Task] = None
+        self._listening = False
+
+    async def lookup(self, developer_key: str) -> Optional[str]:
+        """ 返回 key 对应的 user_id，无效 key 返回 None """
+        digest = hash_key(developer_key)
+        cached = self._cache.get(digest, _MISSING)
+        if cached is not _MISSING:
+            return cached
+
+        generation = self._generation
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            user_id = await conn.fetchval(
+                "SELECT user_id FROM developer_settings WHERE developer_key = $1 AND is_developer = true",
+                developer_key,
+            )
+        if generation == self._generation:
+            self._cache.set(digest, user_id, ttl=None if user_id is not None else self.negative_ttl)
+        return user_id
+
+    def invalidate(self, digest: str) -> None:
+        self._generation += 1
+        self._cache.pop(digest)
+
+    def invalidate_key(self, developer_key: str) -> None:
+        self.invalidate(hash_key(developer_key))
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._cache.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "hits": self._cache.hits,
+            "misses": self._cache.misses,
+            "listening": self._listening,
+        }
+
+    def _on_connect(self) -> None:
+        # 断线期间可能漏掉了通知
+        self._listening = True
+        self.clear()
+
+    def _on_disconnect(self) -> None:
+        # 断线期间无法收到通知，清空缓存后再重连
+        self._listening = False
+        self.clear()
+
+    async def _listen(self) -> None:
+        await listen(
+            CHANNEL, self.invalidate,
+            on_connect=self._on_connect, on_disconnect=self._on_disconnect,
+            reconnect_delay=self.reconnect_delay,
+        )
+
+
+developer_key_cache = DeveloperKeyCache()
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import uuid
+from typing import List, Optional, Tuple
+
+from cryptography.fernet import InvalidToken
+from starlette.concurrency import run_in_threadpool
+
+from backend.db import get_pg_pool
+from backend.security import SecurityManager, get_security_manager
+
+logger = logging.getLogger(__name__)
+
+TOKEN_COLUMNS = ("access_token", "refresh_token")
+
+
+def _rotate_rows(manager: SecurityManager, rows) -> Tuple[List[tuple], int]:
+    """ 返回需要更新的 (id, 旧密文..., 新密文...) 与无法解密的字段数 """
+    updates, invalid = [], 0
+    for row in rows:
+        old = [row[column] for column in TOKEN_COLUMNS]
+        new = []
+        for token in old:
+            if token is None or not manager.needs_rotation(token):
+                new.append(token)
+                continue
+            try:
+                new.append(manager.rotate(token))
+            except InvalidToken:
+                # 不属于密钥环中任何密钥，保持原样
+                invalid += 1
+                new.append(token)
+        if new != old:
+            updates.append((row["id"], *old, *new))
+    return updates, invalid
+
+
+async def reencrypt_social_account_tokens(
+    batch_size: int = 500,
+    pause: float = 0.05,
+    start_after: Optional[uuid.UUID] = None,
+    manager: Optional[SecurityManager] = None,
+) -> dict:
+    """
+    用当前主密钥逐批重新加密 social_accounts 的令牌
+    - 按 id 游标分批，每批一个短事务，不锁全表，服务可以照常读写
+    - 只在令牌未被并发修改时写入（比较旧密文），不会覆盖新写入的数据
+    - 中断后可用返回/日志中的 cursor 作为 start_after 继续
+    """
+    manager = manager or get_security_manager()
+    pool = await get_pg_pool()
+    cursor = start_after or uuid.UUID(int=0)
+    stats = {"scanned": 0, "rotated": 0, "invalid": 0, "cursor": None}
+
+    while True:
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT id, access_token, refresh_token FROM social_accounts
+                WHERE id > $1 AND (access_token IS NOT NULL OR refresh_token IS NOT NULL)
+                ORDER BY id LIMIT $2
+                """,
+                cursor,
+                batch_size,
+            )
+            if not rows:
+                break
+
+            updates, invalid = await run_in_threadpool(_rotate_rows, manager, rows)
+            if updates:
+                result = await conn.execute(
+                    """
+                    UPDATE social_accounts s
+                    SET access_token = v.new_access, refresh_token = v.new_refresh
+                    FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[], $5::text[])
+                         AS v(id, old_access, old_refresh, new_access, new_refresh)
+                    WHERE s.id = v.id
+                      AND s.access_token IS NOT DISTINCT FROM v.old_access
+                      AND s.refresh_token IS NOT DISTINCT FROM v.old_refresh
+                    """,
+                    *(list(column) for column in zip(*updates)),
+                )
+                stats["rotated"] += int(result.split()[-1])
+
+        cursor = rows[-1]["id"]
+        stats["scanned"] += len(rows)
+        stats["invalid"] += invalid
+        stats["cursor"] = str(cursor)
+        logger.info("令牌重新加密进度: %s", stats)
+        if pause:
+            # 让出数据库资源，避免影响线上请求
+            await asyncio.sleep(pause)
+
+    return stats
+
+
+if __name__ == "__main__":
+    from backend.db import pool_manager
+
+    async def _main():
+        try:
+            print(await reencrypt_social_account_tokens())
+        finally:
+            await pool_manager.close()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
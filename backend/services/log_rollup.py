@@ -0,0 +1,70 @@
+from collections import Counter
+from datetime import datetime
+from typing import List
+
+# system_logs 的写入列顺序见 log_sink.SYSTEM_LOG_COLUMNS
+_LEVEL, _USER_ACCOUNT, _CREATED_AT = 0, 3, 7
+
+
+async def apply_system_log_rollup(conn, batch: List[tuple]) -> None:
+    """
+    按 (小时, 日志级别, 用户) 累加本批日志数量
+    - 由 system_log_sink 在写入日志的同一事务内调用
+    - 键按顺序写入，避免多个进程并发 upsert 时互相死锁
+    """
+    counts = Counter(
+        (row[_CREATED_AT].replace(minute=0, second=0, microsecond=0), row[_LEVEL], row[_USER_ACCOUNT] or "")
+        for row in batch
+    )
+    keys = sorted(counts)
+    await conn.execute(
+        """
+        INSERT INTO system_log_rollups (bucket, log_level, user_account, log_count)
+        SELECT * FROM unnest($1::timestamptz[], $2::text[], $3::text[], $4::bigint[])
+        ON CONFLICT (bucket, log_level, user_account)
+        DO UPDATE SET log_count = system_log_rollups.log_count + EXCLUDED.log_count
+        """,
+        [key[0] for key in keys],
+        [key[1] for key in keys],
+        [key[2] for key in keys],
+        [counts[key] for key in keys],
+    )
+
+
+async def rebuild_system_log_rollups(conn, since: datetime) -> None:
+    """
+    从 system_logs 重新汇总 since 所在小时及之后的数据
+    - 用于首次回填，或修正绕过 log sink 直接写入的日志
+    """
+    async with conn.transaction():
+        # 阻塞并发的 upsert 直到重建提交，避免重复或遗漏计数
+        await conn.execute("LOCK TABLE system_log_rollups IN SHARE ROW EXCLUSIVE MODE")
+        await conn.execute(
+            "DELETE FROM system_log_rollups WHERE bucket >= date_trunc('hour', $1::timestamptz)",
+            since,
+        )
+        await conn.execute(
+            """
+            INSERT INTO system_log_rollups (bucket, log_level, user_account, log_count)
+            SELECT date_trunc('hour', created_at), log_level, COALESCE(user_account, ''), COUNT(*)
+            FROM system_logs
+            WHERE created_at >= date_trunc('hour', $1::timestamptz)
+            GROUP BY 1, 2, 3
+            """,
+            since,
+        )
+
+
+async def backfill_system_log_rollups(conn) -> bool:
+    """
+    汇总表为空而 system_logs 已有数据时（例如首次部署汇总表），从最早的日志开始重建
+    - 在应用启动、log sink 开始写入之前调用；汇总表已有数据时只做一次存在性查询
+    - 返回是否执行了回填
+    """
+    if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM system_log_rollups)"):
+        return False
+    since = await conn.fetchval("SELECT min(created_at) FROM system_logs")
+    if since is None:
+        return False
+    await rebuild_system_log_rollups(conn, since)
+    return True
@@ -0,0 +1,158 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Sequence
+
+from backend.db import get_pg_pool
+from backend.services.log_rollup import apply_system_log_rollup
+
+logger = logging.getLogger(__name__)
+
+# 每批写入完成前、同一事务内调用的钩子: (连接, 本批记录)
+BatchHook = Callable[[object, List[tuple]], Awaitable[None]]
+
+
+class LogSink:
+    """
+    进程内异步日志写入器
+    - 日志先进入有界队列，由后台任务按条数或时间阈值批量 COPY 入库
+    - 队列满时丢弃并计数，业务请求不会被日志写入拖慢
+    """
+
+    def __init__(
+        self,
+        table: str,
+        columns: Sequence[str],
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        on_batch: Optional[BatchHook] = None,
+    ):
+        self.table = table
+        self.columns = list(columns)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_batch = on_batch
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._pending: List[tuple] = []
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "flushes": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """ 停止后台任务，并把队列中剩余的日志全部写入 """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        while not self._queue.empty():
+            while len(self._pending) < self.batch_size and not self._queue.empty():
+                self._pending.append(self._queue.get_nowait())
+            await self._flush()
+        if self._pending:
+            await self._flush()
+
+    def emit(self, record: tuple) -> bool:
+        """ 非阻塞写入，队列已满时丢弃并返回 False """
+        self.start()
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    async def emit_wait(self, record: tuple, timeout: float = 1.0) -> bool:
+        """ 队列已满时最多等待 timeout 秒（背压），超时后丢弃 """
+        self.start()
+        try:
+            await asyncio.wait_for(self._queue.put(record), timeout)
+        except asyncio.TimeoutError:
+            self.stats["dropped"] += 1
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "queued": self._queue.qsize() + len(self._pending), "running": self.running}
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._pending:
+                self._pending.append(await self._queue.get())
+            deadline = loop.time() + self.flush_interval
+            while len(self._pending) < self.batch_size:
+                try:
+                    self._pending.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._flush()
+
+    async def _flush(self) -> None:
+        """ 写入当前批次；失败时丢弃该批并计数，避免无限重试堆积内存 """
+        batch = self._pending
+        if not batch:
+            return
+        try:
+            pool = await get_pg_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.copy_records_to_table(self.table, records=batch, columns=self.columns)
+                    if self.on_batch:
+                        await self.on_batch(conn, batch)
+            self.stats["written"] += len(batch)
+            self.stats["flushes"] += 1
+        except asyncio.CancelledError:
+            # 事务已回滚，保留本批，stop() 时重新写入
+            raise
+        except Exception as e:
+            self.stats["failed"] += len(batch)
+            logger.error("日志批量写入 %s 失败: %s", self.table, e)
+        self._pending = []
+
+
+SYSTEM_LOG_COLUMNS = (
+    "log_level", "operation", "message", "user_account",
+    "platform", "ip_address", "user_agent", "created_at",
+)
+
+system_log_sink = LogSink("system_logs", SYSTEM_LOG_COLUMNS, on_batch=apply_system_log_rollup)
+app_log_sink = LogSink("logs", ("message", "timestamp"))
+
+LOG_SINKS = (system_log_sink, app_log_sink)
+
+
+def system_log_record(
+    level: str,
+    operation: str,
+    message: str,
+    user_account: Optional[str] = None,
+    platform: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    user_agent: Optional[str] = None,
+) -> tuple:
+    return (
+        level.upper(), operation, message, user_account,
+        platform, ip_address, user_agent, datetime.now(timezone.utc),
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from backend.db import get_pg_pool
+
+logger = logging.getLogger(__name__)
+
+# 分区表配置: 表名 -> (分区粒度, 预建的未来分区数)
+PARTITIONED_TABLES = {
+    "system_logs": ("day", 7),
+    "activity_logs": ("month", 2),
+}
+
+# 自动保留天数: 表名 -> 天数；system_logs 由 /api/logs/cleanup 手动清理，未配置时不自动删除
+RETENTION_DAYS = {
+    table: int(days)
+    for table, days in (
+        ("activity_logs", os.getenv("ACTIVITY_LOG_RETENTION_DAYS", "365")),
+        ("system_logs", os.getenv("SYSTEM_LOG_RETENTION_DAYS")),
+    )
+    if days
+}
+
+MAINTENANCE_INTERVAL = 3600
+
+
+def _floor(interval: str, day: date) -> date:
+    return day if interval == "day" else day.replace(day=1)
+
+
+def _next(interval: str, lower: date) -> date:
+    if interval == "day":
+        return lower + timedelta(days=1)
+    return (lower.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def partition_name(table: str, interval: str, lower: date) -> str:
+    return f"{table}_p{lower:%Y%m%d}" if interval == "day" else f"{table}_p{lower:%Y%m}"
+
+
+def _parse_partition_name(table: str, interval: str, name: str) -> Optional[date]:
+    pattern = r"(\d{4})(\d{2})(\d{2})" if interval == "day" else r"(\d{4})(\d{2})"
+    match = re.fullmatch(rf"{re.escape(table)}_p{pattern}", name)
+    if not match:
+        return None
+    parts = [int(part) for part in match.groups()]
+    return date(parts[0], parts[1], parts[2] if interval == "day" else 1)
+
+
+def _bound(day: date) -> str:
+    return f"'{day.isoformat()} 00:00:00+00'"
+
+
+def default_partition(table: str) -> str:
+    return f"{table}_default"
+
+
+INSERTABLE_COLUMNS_SQL = """
+SELECT attname FROM pg_attribute
+WHERE attrelid = $1::regclass AND attnum > 0 AND NOT attisdropped AND attgenerated = ''
+ORDER BY attnum
+"""
+
+
+async def _create_partition(conn, table: str, name: str, lower: date, upper: date) -> int:
+    """
+    创建分区，返回从默认分区移入的行数
+    - 默认分区中已有该范围的行时直接 PARTITION OF 会失败，
+      此时在一个事务内先建普通表、把这些行从默认分区移过去，再 ATTACH
+    - 普通表带上生成列定义（如 system_logs.search_vector），移动时只写入非生成列，由数据库重新计算
+    - 多个进程同时维护时用事务级咨询锁串行化同名分区的创建，后到的发现分区已存在直接返回
+    """
+    default = default_partition(table)
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext($1))", name)
+        if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+            return 0
+        stranded = await conn.fetchval(
+            f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= {_bound(lower)} AND created_at < {_bound(upper)})"
+        )
+        if not stranded:
+            # 分区边界由本模块生成，不含用户输入
+            await conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+                f"FOR VALUES FROM ({_bound(lower)}) TO ({_bound(upper)})"
+            )
+            return 0
+
+        await conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} "
+            f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED)"
+        )
+        columns = ", ".join(
+            '"{}"'.format(row["attname"].replace('"', '""'))
+            for row in await conn.fetch(INSERTABLE_COLUMNS_SQL, table)
+        )
+        result = await conn.execute(
+            f"WITH moved AS (DELETE FROM {default} "
+            f"WHERE created_at >= {_bound(lower)} AND created_at < {_bound(upper)} RETURNING *) "
+            f"INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+        )
+        await conn.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ({_bound(lower)}) TO ({_bound(upper)})"
+        )
+    moved = int(result.split()[-1])
+    logger.warning("%s 默认分区中有 %d 行属于新分区 %s，已移入", table, moved, name)
+    return moved
+
+
+async def ensure_partitions(conn, table: str, today: Optional[date] = None) -> List[str]:
+    """ 创建当前及未来若干个分区（已存在的跳过），返回新建的分区名 """
+    interval, premake = PARTITIONED_TABLES[table]
+    lower = _floor(interval, today or datetime.now(timezone.utc).date())
+    created = []
+    for _ in range(premake + 1):
+        upper = _next(interval, lower)
+        name = partition_name(table, interval, lower)
+        exists = await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name)
+        if not exists:
+            await _create_partition(conn, table, name, lower, upper)
+            created.append(name)
+        lower = upper
+    return created
+
+
+async def drop_expired_partitions(conn, table: str, cutoff: datetime) -> Tuple[List[str], int]:
+    """
+    删除上界不晚于 cutoff 的整个分区
+    - 不产生逐行删除的 WAL 与表膨胀，耗时与分区内行数无关
+    - 返回 (已删除的分区名, 按 reltuples 估算的删除行数)
+    """
+    interval, _ = PARTITIONED_TABLES[table]
+    rows = await conn.fetch(
+        """
+        SELECT c.relname, c.reltuples
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = $1::regclass
+        """,
+        table,
+    )
+    cutoff_day = cutoff.astimezone(timezone.utc).date()
+    dropped, estimated_rows = [], 0
+    for row in sorted(rows, key=lambda r: r["relname"]):
+        lower = _parse_partition_name(table, interval, row["relname"])
+        if lower is None or _next(interval, lower) > cutoff_day:
+            continue
+        await conn.execute(f"DROP TABLE IF EXISTS {row['relname']}")
+        dropped.append(row["relname"])
+        estimated_rows += max(int(row["reltuples"]), 0)
+    return dropped, estimated_rows
+
+
+async def apply_retention(conn, table: str, cutoff: datetime) -> Tuple[datetime, List[str], int]:
+    """
+    删除 cutoff 之前的数据：过期分区整体删除，默认分区中的少量数据逐行删除
+    - cutoff 向下取整到分区边界
+    - 返回 (实际截止时间, 已删除的分区名, 删除行数；删除了分区时为估算值)
+    """
+    cutoff = partition_floor(table, cutoff)
+    dropped, deleted = await drop_expired_partitions(conn, table, cutoff)
+    result = await conn.execute(f"DELETE FROM {default_partition(table)} WHERE created_at < $1", cutoff)
+    return cutoff, dropped, deleted + int(result.split()[-1])
+
+
+def partition_floor(table: str, moment: datetime) -> datetime:
+    """ 返回 moment 所在分区的下界（UTC） """
+    interval, _ = PARTITIONED_TABLES[table]
+    lower = _floor(interval, moment.astimezone(timezone.utc).date())
+    return datetime(lower.year, lower.month, lower.day, tzinfo=timezone.utc)
+
+
+async def maintain_partitions() -> None:
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        for table in PARTITIONED_TABLES:
+            try:
+                created = await ensure_partitions(conn, table)
+                if created:
+                    logger.info("已创建分区: %s", ", ".join(created))
+            except Exception as e:
+                logger.error("维护 %s 分区失败: %s", table, e)
+            if table not in RETENTION_DAYS:
+                continue
+            try:
+                cutoff = datetime.now(timezone.utc) - timedelta(days=RETENTION_DAYS[table])
+                _, dropped, deleted = await apply_retention(conn, table, cutoff)
+                if dropped or deleted:
+                    logger.info("%s 保留期清理: 删除分区 %s，约 %d 行", table, ", ".join(dropped) or "-", deleted)
+            except Exception as e:
+                logger.error("清理 %s 过期分区失败: %s", table, e)
+
+
+async def run_partition_maintenance(interval: float = MAINTENANCE_INTERVAL) -> None:
+    """ 后台任务：定期预建未来分区并按保留期删除过期分区（启动时的首次维护由 lifespan 完成） """
+    while True:
+        await asyncio.sleep(interval)
+        await maintain_partitions()
@@ -0,0 +1,332 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+
+from backend.db import decode_jsonb, get_pg_pool, listen
+from backend.services.publisher import Publisher, load_targets, publisher as default_publisher
+
+logger = logging.getLogger(__name__)
+
+# scheduled_posts 上的触发器在帖子进入/重新进入 scheduled 状态时发送 "<id> <scheduled_time 的 epoch 秒>"
+CHANNEL = "scheduled_posts"
+
+PRELOAD_SQL = """
+SELECT id, scheduled_time FROM scheduled_posts
+WHERE status = 'scheduled' AND scheduled_time <= $1
+ORDER BY scheduled_time
+LIMIT $2
+"""
+
+CLAIM_SQL = """
+UPDATE scheduled_posts
+SET status = 'publishing', claimed_at = NOW()
+WHERE id IN (
+    SELECT id FROM scheduled_posts
+    WHERE id = ANY($1::uuid[]) AND status = 'scheduled' AND scheduled_time <= $2
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING id, user_id, title, content, media_urls, target_accounts, published_targets, scheduled_time
+"""
+
+# published_targets 记录已发布成功的目标（账号 id -> 平台帖子 id），失败后重新排期时跳过这些目标
+COMPLETE_SQL = """
+UPDATE scheduled_posts sp
+SET status = v.status, published_at = v.published_at, error_message = v.error_message,
+    published_targets = COALESCE(sp.published_targets, '{}'::jsonb) || v.published_targets::jsonb,
+    claimed_at = NULL, updated_at = NOW()
+FROM unnest($1::uuid[], $2::text[], $3::timestamptz[], $4::text[], $5::text[])
+    AS v(id, status, published_at, error_message, published_targets)
+WHERE sp.id = v.id AND sp.status = 'publishing'
+"""
+
+RELEASE_STALE_SQL = """
+UPDATE scheduled_posts
+SET status = 'scheduled', claimed_at = NULL
+WHERE status = 'publishing' AND claimed_at < NOW() - make_interval(secs => $1)
+"""
+
+# 认领时允许应用与数据库之间的时钟误差
+CLOCK_TOLERANCE = timedelta(milliseconds=50)
+
+
+class PostDispatcher:
+    """
+    定时帖子分发
+    - 每 refill_interval 秒用一次索引范围查询，把 lookahead 秒内到期（含已逾期）的帖子预加载到内存最小堆，
+      到点即触发，不再按固定间隔轮询数据库；窗口内新建或改期的帖子通过 LISTEN/NOTIFY 加入堆
+    - 到期帖子用 FOR UPDATE SKIP LOCKED 认领并置为 publishing，多个进程同时预加载同一批帖子也不会重复发布
+    - 一批内所有帖子、所有目标账号并发发布，结果用一条 UPDATE 批量写回；同时处理的批次不超过 max_inflight，
+      其余到期帖子留在堆中，避免积压时发布请求和数据库连接无上限增长
+    - 发布成功的目标记入 published_targets，部分失败的帖子重新排期后只发布尚未成功的目标
+    - 认领后进程崩溃的帖子，超过 claim_timeout 秒后重新放回队列（此时可能重复发布，属于至少一次语义）
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        lookahead: float = 300.0,
+        refill_interval: float = 60.0,
+        max_preload: int = 10000,
+        claim_timeout: float = 600.0,
+        retry_interval: float = 1.0,
+        max_inflight: int = 4,
+        publisher: Optional[Publisher] = None,
+    ):
+        self.batch_size = batch_size
+        self.lookahead = lookahead
+        self.refill_interval = min(refill_interval, lookahead)
+        self.max_preload = max_preload
+        self.claim_timeout = claim_timeout
+        self.retry_interval = retry_interval
+        self.max_inflight = max_inflight
+        self.publisher = publisher or default_publisher
+
+        self._heap: List[Tuple[float, str]] = []
+        # post_id -> 当前有效的触发时间；堆中时间不一致的条目是改期前留下的，弹出时丢弃
+        self._queued: Dict[str, float] = {}
+        # 堆中已包含 scheduled_time 不晚于该时间点的全部帖子
+        self._window_end = 0.0
+        self._force_refill = False
+        self._wakeup = asyncio.Event()
+        self._inflight: Set[asyncio.Task] = set()
+        # 同时处理的批次上限；没有空位时到期帖子留在堆中
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._task: Optional[asyncio.Task] = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats = {
+            "preloads": 0, "claimed": 0, "published": 0, "failed": 0, "released": 0, "errors": 0,
+            "fired": 0, "lateness_max_ms": 0.0, "lateness_total_ms": 0.0,
+        }
+
+    def schedule(self, post_id, when: Union[datetime, float]) -> None:
+        """ 把帖子加入内存堆；超出当前预加载窗口的交给下次预加载 """
+        timestamp = when.timestamp() if isinstance(when, datetime) else float(when)
+        post_id = str(post_id)
+        if timestamp > self._window_end or self._queued.get(post_id) == timestamp:
+            return
+        self._queued[post_id] = timestamp
+        heapq.heappush(self._heap, (timestamp, post_id))
+        self._wakeup.set()
+
+    def _on_notify(self, payload: str) -> None:
+        post_id, _, timestamp = payload.partition(" ")
+        self.schedule(post_id, float(timestamp))
+
+    def _on_connect(self) -> None:
+        # 断线期间可能漏掉了通知，立即重新预加载
+        self._force_refill = True
+        self._wakeup.set()
+
+    async def refill(self) -> bool:
+        """ 预加载窗口内的帖子，返回结果是否被 max_preload 截断 """
+        window_end = time.time() + self.lookahead
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            rows = await conn.fetch(PRELOAD_SQL, datetime.fromtimestamp(window_end, timezone.utc), self.max_preload)
+        truncated = len(rows) >= self.max_preload
+        self._window_end = rows[-1]["scheduled_time"].timestamp() if truncated else window_end
+        for row in rows:
+            self.schedule(row["id"], row["scheduled_time"])
+        self.stats["preloads"] += 1
+        return truncated
+
+    def _pop_due(self, now: float, limit: int) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now and len(due) < limit:
+            timestamp, post_id = heapq.heappop(self._heap)
+            if self._queued.get(post_id) != timestamp:
+                continue
+            del self._queued[post_id]
+            lateness_ms = (now - timestamp) * 1000
+            self.stats["fired"] += 1
+            self.stats["lateness_total_ms"] += lateness_ms
+            self.stats["lateness_max_ms"] = max(self.stats["lateness_max_ms"], lateness_ms)
+            due.append(post_id)
+        return due
+
+    async def claim(self, post_ids: List[str]) -> List[Dict[str, Any]]:
+        """ 认领已到期的帖子；已被其他进程认领、取消或改到更晚时间的会被跳过 """
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            # 认领和读取目标在同一事务内，中途出错时认领一起回滚，帖子留在 scheduled 由下次预加载重新加入
+            async with conn.transaction():
+                rows = await conn.fetch(CLAIM_SQL, post_ids, datetime.now(timezone.utc) + CLOCK_TOLERANCE)
+                posts = [dict(row) for row in rows]
+                for post in posts:
+                    await self._load_post_targets(conn, post)
+        self.stats["claimed"] += len(posts)
+        return posts
+
+    async def _load_post_targets(self, conn, post: Dict[str, Any]) -> None:
+        """ 读取帖子所有者名下、尚未发布成功的目标账号；单个帖子出错只让该帖子失败 """
+        post["published_targets"] = decode_jsonb(post["published_targets"]) or {}
+        account_ids = [
+            account_id for account_id in decode_jsonb(post["target_accounts"]) or []
+            if str(account_id) not in post["published_targets"]
+        ]
+        post["targets"], post["target_failures"] = [], []
+        try:
+            # 保存点：查询出错不会中止整个认领事务
+            async with conn.transaction():
+                post["targets"], post["target_failures"] = await load_targets(conn, account_ids, post["user_id"])
+        except Exception as e:
+            logger.error("读取帖子 %s 的目标账号失败: %s", post["id"], e)
+            post["load_error"] = f"读取目标账号失败: {e}"
+
+    async def publish(self, post: Dict[str, Any]) -> tuple:
+        """ 返回 (id, status, published_at, error_message, 本次发布成功的目标 JSON) """
+        content = {
+            "title": post["title"],
+            "text_content": post["content"],
+            "media_urls": decode_jsonb(post["media_urls"]) or [],
+        }
+        results = await self.publisher.publish(content, post["targets"]) + post["target_failures"]
+        published = json.dumps({result["id"]: result.get("post_id") for result in results if result["success"]})
+        errors = [f"{result['id']}: {result['error']}" for result in results if not result["success"]]
+        if post.get("load_error"):
+            errors.append(post["load_error"])
+        elif not results and not post["published_targets"]:
+            errors.append("没有目标账号")
+        if errors:
+            self.stats["failed"] += 1
+            return post["id"], "failed", None, "; ".join(errors)[:2000], published
+        self.stats["published"] += 1
+        return post["id"], "published", datetime.now(timezone.utc), None, published
+
+    async def complete(self, outcomes: List[tuple]) -> None:
+        if not outcomes:
+            return
+        columns = [list(column) for column in zip(*outcomes)]
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            await conn.execute(COMPLETE_SQL, *columns)
+
+    async def dispatch(self, post_ids: List[str]) -> int:
+        """ 认领并发布一批到期帖子，返回实际认领的数量 """
+        posts = await self.claim(post_ids)
+        if posts:
+            outcomes = await asyncio.gather(*(self.publish(post) for post in posts))
+            await self.complete(outcomes)
+        return len(posts)
+
+    async def _dispatch(self, post_ids: List[str]) -> None:
+        try:
+            await self.dispatch(post_ids)
+        except Exception as e:
+            # 未写回的帖子停留在 publishing，由超时回收重新发布
+            self.stats["errors"] += 1
+            logger.error("定时帖子分发失败: %s", e)
+        finally:
+            self._slots.release()
+            # 空出位置后处理堆中等待的到期帖子
+            self._wakeup.set()
+
+    async def release_stale_claims(self) -> int:
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            result = await conn.execute(RELEASE_STALE_SQL, self.claim_timeout)
+        released = int(result.split()[-1])
+        self.stats["released"] += released
+        return released
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._stopping = False
+            loop = asyncio.get_running_loop()
+            self._task = loop.create_task(self._run())
+            self._listen_task = loop.create_task(
+                listen(CHANNEL, self._on_notify, on_connect=self._on_connect)
+            )
+
+    async def stop(self, timeout: float = 30.0) -> None:
+        """ 等待已认领的帖子处理完再退出，超时则取消（未完成的帖子由超时回收） """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._listen_task.cancel()
+        tasks = [self._task, self._listen_task, *self._inflight]
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = self._listen_task = None
+
+    async def _run(self) -> None:
+        next_refill = next_release = 0.0
+        while not self._stopping:
+            self._wakeup.clear()
+            now = time.time()
+            try:
+                if now >= next_release:
+                    await self.release_stale_claims()
+                    next_release = now + 60
+                if now >= next_refill or self._force_refill:
+                    self._force_refill = False
+                    truncated = await self.refill()
+                    # 被截断说明积压较多，处理完这一批后尽快继续预加载
+                    next_refill = time.time() + (self.retry_interval if truncated else self.refill_interval)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error("定时帖子预加载失败: %s", e)
+                next_refill = time.time() + self.retry_interval
+
+            while not self._slots.locked():
+                due = self._pop_due(time.time(), self.batch_size)
+                if not due:
+                    break
+                await self._slots.acquire()
+                task = asyncio.create_task(self._dispatch(due))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+
+            # 批次已满时不按堆顶时间唤醒，等批次完成后由 _dispatch 唤醒
+            next_due = self._heap[0][0] if self._heap and not self._slots.locked() else float("inf")
+            wake_at = min(next_refill, next_release, next_due)
+            timeout = wake_at - time.time()
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    def snapshot(self) -> dict:
+        fired = self.stats["fired"]
+        return {
+            **self.stats,
+            "lateness_avg_ms": round(self.stats["lateness_total_ms"] / fired, 3) if fired else 0.0,
+            "queued": len(self._queued),
+            "inflight_batches": len(self._inflight),
+            "max_inflight": self.max_inflight,
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+post_dispatcher = PostDispatcher(
+    batch_size=int(os.getenv("POST_DISPATCH_BATCH_SIZE", "50")),
+    lookahead=float(os.getenv("POST_DISPATCH_LOOKAHEAD", "300")),
+    max_inflight=int(os.getenv("POST_DISPATCH_MAX_INFLIGHT", "4")),
+)
+
+
+if __name__ == "__main__":
+    from backend.db import pool_manager
+    from backend.platform_api.base import PlatformBase
+
+    async def _main():
+        post_dispatcher.start()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await post_dispatcher.stop()
+            await PlatformBase.aclose_clients()
+            await pool_manager.close()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from backend.platform_api.base import PlatformBase, PlatformError
+from backend.platform_api.facebook import FacebookPlatform
+from backend.platform_api.tiktok import TikTokPlatform
+from backend.platform_api.wechat import WechatPlatform
+from backend.security import get_security_manager
+
+logger = logging.getLogger(__name__)
+
+PLATFORM_ADAPTERS: Dict[str, Type[PlatformBase]] = {
+    "facebook": FacebookPlatform,
+    "tiktok": TikTokPlatform,
+    "wechat": WechatPlatform,
+}
+
+# 每个平台在本进程内同时进行的发布请求上限
+PLATFORM_CONCURRENCY = int(os.getenv("PLATFORM_PUBLISH_CONCURRENCY", "20"))
+
+
+class Publisher:
+    """
+    多平台并发发布
+    - 一条内容的所有目标账号同时发布，总耗时取决于最慢的一次调用
+    - 每个平台一个信号量，进程内所有发布共享，避免单个平台被打满或触发限流
+    - 每个目标单独返回结果，单个失败不影响其他目标
+    """
+
+    def __init__(self, adapters: Optional[Dict[str, Type[PlatformBase]]] = None, concurrency: int = PLATFORM_CONCURRENCY):
+        self.adapters = {name: adapter() for name, adapter in (adapters or PLATFORM_ADAPTERS).items()}
+        self.concurrency = concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, platform: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(platform)
+        if semaphore is None:
+            semaphore = self._semaphores[platform] = asyncio.Semaphore(self.concurrency)
+        return semaphore
+
+    async def publish(self, content: Dict[str, Any], targets: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        targets 中每项包含 platform、account_id、access_token（可选 id 为 social_accounts 主键）
+        返回与 targets 顺序一致的结果列表
+        """
+        return await asyncio.gather(*(self._publish_one(content, target) for target in targets))
+
+    async def _publish_one(self, content: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+        platform = target.get("platform")
+        result = {"id": target.get("id"), "platform": platform, "account_id": target.get("account_id")}
+        adapter = self.adapters.get((platform or "").lower())
+        if adapter is None:
+            return {**result, "success": False, "error": f"不支持的平台: {platform}", "retryable": False}
+
+        started = time.perf_counter()
+        try:
+            async with self._semaphore(platform.lower()):
+                published = await adapter.publish(content, target)
+            result.update(success=True, post_id=published.get("post_id"))
+        except PlatformError as e:
+            result.update(success=False, error=str(e), retryable=e.retryable)
+        except Exception as e:
+            logger.exception("发布到 %s 失败", platform)
+            result.update(success=False, error=str(e), retryable=False)
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    async def test_all(self) -> Dict[str, Any]:
+        names = list(self.adapters)
+        results = await asyncio.gather(*(self.adapters[name].test() for name in names), return_exceptions=True)
+        return {name: str(result) for name, result in zip(names, results)}
+
+
+TARGETS_SQL = """
+SELECT sa.id, p.name AS platform, sa.account_id, sa.account_handle, sa.access_token
+FROM social_accounts sa
+JOIN platforms p ON p.id = sa.platform_id
+WHERE sa.id = ANY($1::uuid[]) AND sa.user_id = $2
+"""
+
+
+def _target_failure(account_id: Any, error: str) -> Dict[str, Any]:
+    # 与 Publisher.publish 的单条结果格式一致，调用方可以直接合并到结果列表
+    return {"id": str(account_id), "platform": None, "account_id": None, "success": False, "error": error, "retryable": False}
+
+
+async def _decrypt_tokens(targets: List[Dict[str, Any]]) -> List[Any]:
+    """ 整批解密；失败时逐个重试，无法解密的令牌位置返回异常对象 """
+    security = get_security_manager()
+    tokens = [target["access_token"] for target in targets]
+    try:
+        return await security.decrypt_many_async(tokens)
+    except Exception:
+        results = []
+        for token in tokens:
+            try:
+                results.extend(await security.decrypt_many_async([token]))
+            except Exception as e:
+                results.append(e)
+        return results
+
+
+async def load_targets(conn, account_ids: Sequence[Any], user_id: Any) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    按 social_accounts 主键读取 user_id 名下的发布目标并解密令牌
+    返回 (targets, failures)：targets 顺序与 account_ids 一致；
+    格式错误、不存在或不属于该用户、令牌无法解密的账号各自记入 failures，不影响其他目标
+    """
+    targets, failures, valid = [], [], []
+    for account_id in account_ids:
+        try:
+            valid.append(str(uuid.UUID(str(account_id))))
+        except (TypeError, ValueError, AttributeError):
+            failures.append(_target_failure(account_id, "无效的账号ID"))
+    if not valid:
+        return targets, failures
+
+    rows = await conn.fetch(TARGETS_SQL, valid, user_id)
+    by_id = {str(row["id"]): dict(row) for row in rows}
+    for account_id in valid:
+        if account_id in by_id:
+            targets.append(by_id[account_id])
+        else:
+            failures.append(_target_failure(account_id, "账号不存在或无权访问"))
+
+    loaded = []
+    for target, token in zip(targets, await _decrypt_tokens(targets)):
+        target["id"] = str(target["id"])
+        if isinstance(token, Exception):
+            logger.warning("账号 %s 的令牌无法解密: %r", target["id"], token)
+            failures.append({**_target_failure(target["id"], "令牌无法解密，请重新授权"), "platform": target["platform"]})
+            continue
+        target["access_token"] = token
+        loaded.append(target)
+    return loaded, failures
+
+
+publisher = Publisher()
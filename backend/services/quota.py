@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from backend.db import get_pg_pool
+
+logger = logging.getLogger(__name__)
+
+
+class _Usage:
+    __slots__ = ("quota", "usage", "pending", "synced_at", "used_at")
+
+    def __init__(self, quota: int, usage: int):
+        self.quota = quota
+        self.usage = usage        # 最近一次同步时数据库中的用量（含其他进程已写入的部分）
+        self.pending = 0          # 本进程已计数、尚未写入数据库的增量
+        self.synced_at = time.monotonic()
+        self.used_at = self.synced_at
+
+
+class QuotaMeter:
+    """
+    开发者 API 配额计量
+    - 请求只在进程内累加计数并按本地视图判断是否超额，不访问数据库
+    - 后台任务每 flush_interval 秒把各用户的增量用一条 UPDATE 批量写入，并取回最新的总用量
+    - 其他进程的用量最多滞后一个同步周期，超额量上限约为 进程数 x 单进程请求速率 x flush_interval
+    """
+
+    def __init__(self, flush_interval: float = 1.0, refresh_interval: float = 30.0, idle_ttl: float = 600.0):
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[object, _Usage] = {}
+        self._loading: Dict[object, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"allowed": 0, "rejected": 0, "flushes": 0, "flush_failures": 0}
+
+    async def consume(self, user_id, amount: int = 1) -> Tuple[bool, int, int]:
+        """ 计入 amount 次调用，返回 (是否允许, 当前用量, 配额)；超额时不计数 """
+        entry = self._entries.get(user_id)
+        if entry is None or time.monotonic() - entry.synced_at > self.refresh_interval:
+            entry = await self._load(user_id)
+            if entry is None:
+                raise KeyError(user_id)
+
+        entry.used_at = time.monotonic()
+        used = entry.usage + entry.pending
+        if used + amount > entry.quota:
+            self.stats["rejected"] += 1
+            return False, used, entry.quota
+        entry.pending += amount
+        self.stats["allowed"] += 1
+        return True, used + amount, entry.quota
+
+    def pending(self, user_id) -> int:
+        entry = self._entries.get(user_id)
+        return entry.pending if entry else 0
+
+    async def _load(self, user_id) -> Optional[_Usage]:
+        # 同一用户的并发加载只查询一次
+        future = self._loading.get(user_id)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(user_id))
+            self._loading[user_id] = future
+            future.add_done_callback(lambda _: self._loading.pop(user_id, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, user_id) -> Optional[_Usage]:
+        pool = await get_pg_pool()
+        async with pool.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT api_quota, api_usage FROM developer_settings WHERE user_id = $1",
+                user_id,
+            )
+        if row is None:
+            return None
+        entry = self._entries.get(user_id)
+        if entry is None:
+            entry = self._entries[user_id] = _Usage(row["api_quota"], row["api_usage"])
+        else:
+            # 保留尚未写入的增量
+            entry.quota, entry.usage, entry.synced_at = row["api_quota"], row["api_usage"], time.monotonic()
+        return entry
+
+    async def flush(self) -> None:
+        """ 把所有待写入增量合并为一条 UPDATE；失败时增量保留到下一轮 """
+        deltas = {user_id: entry.pending for user_id, entry in self._entries.items() if entry.pending}
+        if not deltas:
+            return
+        for user_id in deltas:
+            self._entries[user_id].pending -= deltas[user_id]
+
+        # 按 user_id 排序加锁，多个进程同时写入时不会死锁
+        user_ids = sorted(deltas, key=str)
+        try:
+            pool = await get_pg_pool()
+            async with pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute(
+                        "SELECT 1 FROM developer_settings WHERE user_id = ANY($1::uuid[]) ORDER BY user_id FOR UPDATE",
+                        user_ids,
+                    )
+                    rows = await conn.fetch(
+                        """
+                        UPDATE developer_settings d
+                        SET api_usage = d.api_usage + v.delta, updated_at = NOW()
+                        FROM unnest($1::uuid[], $2::int[]) AS v(user_id, delta)
+                        WHERE d.user_id = v.user_id
+                        RETURNING d.user_id, d.api_usage, d.api_quota
+                        """,
+                        user_ids,
+                        [deltas[user_id] for user_id in user_ids],
+                    )
+        except asyncio.CancelledError:
+            self._restore(deltas)
+            raise
+        except Exception as e:
+            self._restore(deltas)
+            self.stats["flush_failures"] += 1
+            logger.error("配额用量写入失败: %s", e)
+            return
+
+        now = time.monotonic()
+        for row in rows:
+            entry = self._entries.get(row["user_id"])
+            if entry is not None:
+                entry.usage, entry.quota, entry.synced_at = row["api_usage"], row["api_quota"], now
+        self.stats["flushes"] += 1
+
+    def _restore(self, deltas: Dict[object, int]) -> None:
+        for user_id, delta in deltas.items():
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                entry.pending += delta
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        for user_id in [uid for uid, entry in self._entries.items() if not entry.pending and entry.used_at < cutoff]:
+            del self._entries[user_id]
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """ 停止后台任务并写入剩余增量 """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            self._evict_idle()
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "tracked_users": len(self._entries),
+            "pending": sum(entry.pending for entry in self._entries.values()),
+            "running": self._task is not None and not self._task.done(),
+        }
+
+
+quota_meter = QuotaMeter()
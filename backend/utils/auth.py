@@ -1,10 +1,128 @@
-from fastapi import Request
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from jose import JWTError, jwk, jwt
+
+logger = logging.getLogger(__name__)
+
+SUPABASE_URL = os.getenv("SUPABASE_URL", "").rstrip("/")
+SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
+SUPABASE_JWT_AUDIENCE = os.getenv("SUPABASE_JWT_AUDIENCE", "authenticated")
+JWKS_TTL = float(os.getenv("SUPABASE_JWKS_TTL", "600"))
+# 遇到未知 kid 时两次拉取 JWKS 的最小间隔，防止伪造 kid 的请求打爆认证服务
+JWKS_MIN_REFRESH_INTERVAL = 30.0
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
 
 class User:
-    def __init__(self, id: int = 1, role: str = "developer"):
+    def __init__(self, id: int = 1, role: str = "developer", email: Optional[str] = None, claims: Optional[dict] = None):
         self.id = id
         self.role = role
+        self.email = email
+        self.claims = claims or {}
+
+
+class JWKSCache:
+    """
+    Supabase 签名公钥缓存
+    - 公钥按 kid 预先构造好，验签时不再解析 JWK
+    - 超过 ttl 或遇到未知 kid（密钥轮换）时才重新拉取，并发拉取只发一次请求
+    """
+
+    def __init__(self, url: str, ttl: float = JWKS_TTL, min_refresh_interval: float = JWKS_MIN_REFRESH_INTERVAL):
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, jwk.Key] = {}
+        self._fetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    async def get_key(self, kid: Optional[str]) -> Optional[jwk.Key]:
+        now = time.monotonic()
+        key = self._keys.get(kid)
+        if key is not None and now - self._fetched_at < self.ttl:
+            return key
+        if key is None and now - self._fetched_at < self.min_refresh_interval:
+            return None
+        async with self._lock:
+            # 等锁期间其他请求可能已经刷新
+            if time.monotonic() - self._fetched_at >= self.min_refresh_interval:
+                await self._refresh()
+        return self._keys.get(kid)
+
+    async def _refresh(self) -> None:
+        """ 拉取并构造公钥；单个公钥无法解析时跳过，拉取失败或没有可用公钥时继续使用旧公钥 """
+        self._fetched_at = time.monotonic()
+        try:
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.get(self.url)
+                response.raise_for_status()
+                items = response.json().get("keys", [])
+        except (httpx.HTTPError, ValueError, AttributeError) as e:
+            logger.warning("拉取 JWKS 失败，继续使用旧公钥: %s", e)
+            return
+        keys = {}
+        for item in items if isinstance(items, list) else []:
+            try:
+                if item.get("alg") in ASYMMETRIC_ALGORITHMS:
+                    keys[item.get("kid")] = jwk.construct(item, item["alg"])
+            except Exception as e:
+                logger.warning("跳过无法解析的 JWKS 公钥 kid=%r: %s", item.get("kid") if isinstance(item, dict) else None, e)
+        if not keys:
+            logger.warning("JWKS 中没有可用的公钥，继续使用旧公钥")
+            return
+        self._keys = keys
+
+
+_jwks = JWKSCache(f"{SUPABASE_URL}/auth/v1/.well-known/jwks.json") if SUPABASE_URL else None
+_hs256_key = jwk.construct(SUPABASE_JWT_SECRET, "HS256") if SUPABASE_JWT_SECRET else None
+
+
+async def verify_access_token(token: str) -> dict:
+    """ 本地校验 Supabase access token（签名、exp、aud），返回 claims；没有 exp 的令牌一律拒绝 """
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="无效的访问令牌")
+
+    algorithm = header.get("alg")
+    if algorithm == "HS256" and _hs256_key is not None:
+        key = _hs256_key
+    elif algorithm in ASYMMETRIC_ALGORITHMS and _jwks is not None:
+        key = await _jwks.get_key(header.get("kid"))
+    else:
+        key = None
+    if key is None:
+        raise HTTPException(status_code=401, detail="无法识别的令牌签名密钥")
+
+    try:
+        return jwt.decode(
+            token, key, algorithms=[algorithm], audience=SUPABASE_JWT_AUDIENCE, options={"require_exp": True}
+        )
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"访问令牌校验失败: {e}")
+
+
+async def get_current_user(request: Request):
+    # 未配置 SUPABASE_URL / SUPABASE_JWT_SECRET 时沿用开发模式，始终返回开发者用户
+    if _jwks is None and _hs256_key is None:
+        return User()
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(status_code=401, detail="缺少访问令牌")
 
-def get_current_user(request: Request):
-    # 简单版本，始终返回开发者用户
-    return User()
\ No newline at end of file
+    claims = await verify_access_token(token)
+    app_metadata = claims.get("app_metadata") or {}
+    return User(
+        id=claims.get("sub"),
+        role=app_metadata.get("role") or claims.get("role"),
+        email=claims.get("email"),
+        claims=claims,
+    )
@@ -0,0 +1,129 @@
+import calendar
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name.lower(): index for index, name in enumerate(calendar.month_abbr) if name}
+DAY_NAMES = {name: index for index, name in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+# 下一次触发时间最多向后查找的天数
+MAX_SEARCH_DAYS = 366 * 5
+
+
+def _parse_field(text: str, low: int, high: int, names: Optional[Dict[str, int]] = None) -> FrozenSet[int]:
+    def value(token: str) -> int:
+        if names and token.lower() in names:
+            return names[token.lower()]
+        if not token.isdigit():
+            raise ValueError(f"无法识别的值 '{token}'")
+        return int(token)
+
+    values = set()
+    for part in text.split(","):
+        span, slash, step_text = part.partition("/")
+        step = int(step_text) if step_text.isdigit() else 0
+        if slash and step <= 0:
+            raise ValueError(f"无效的步长 '{part}'")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start_text, _, end_text = span.partition("-")
+            start, end = value(start_text), value(end_text)
+        else:
+            start = value(span)
+            end = high if slash else start
+        if not low <= start <= end <= high:
+            raise ValueError(f"'{part}' 超出范围 {low}-{high}")
+        values.update(range(start, end + 1, step or 1))
+    return frozenset(values)
+
+
+class CronExpression:
+    """
+    5 段 cron 表达式（分 时 日 月 周），构造时解析一次，之后只做查表计算
+    - 支持 * , - / 、月份与星期英文缩写、@daily 等宏，星期 0 和 7 都表示周日
+    - 日与周按 Vixie cron 规则组合：任一字段以 * 开头（如 * 或 */2）时两者取交集，否则取并集
+    - next_after 在传入时间所在的时区按墙上时间计算
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = MACROS.get(self.expression.lower(), self.expression).split()
+        if len(fields) != 5:
+            raise ValueError("需要 5 个字段: 分 时 日 月 周")
+        minute, hour, day, month, weekday = fields
+
+        self.minutes: Tuple[int, ...] = tuple(sorted(_parse_field(minute, 0, 59)))
+        self.hours: Tuple[int, ...] = tuple(sorted(_parse_field(hour, 0, 23)))
+        self.days = _parse_field(day, 1, 31)
+        self.months: Tuple[int, ...] = tuple(sorted(_parse_field(month, 1, 12, MONTH_NAMES)))
+        self.weekdays = frozenset(d % 7 for d in _parse_field(weekday, 0, 7, DAY_NAMES))
+        self.any_day = day.startswith("*")
+        self.any_weekday = weekday.startswith("*")
+
+        if self.any_day or self.any_weekday:
+            # 取交集时日必须在所选月份内存在，例如 "0 0 30 2 *" 永远不会触发（按闰年 2 月 29 天计算）
+            if not any(min(self.days) <= calendar.monthrange(2000, m)[1] for m in self.months):
+                raise ValueError("表达式永远不会触发")
+
+    def _day_matches(self, day: datetime) -> bool:
+        day_ok = day.day in self.days
+        weekday_ok = day.isoweekday() % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """ 返回严格晚于 after 的下一次触发时间（精确到分钟），找不到时返回 None """
+        tzinfo = after.tzinfo
+        current = after.replace(second=0, microsecond=0, tzinfo=None) + timedelta(minutes=1)
+        months = self.months
+
+        for _ in range(MAX_SEARCH_DAYS):
+            if current.month not in months:
+                index = bisect_left(months, current.month)
+                year = current.year if index < len(months) else current.year + 1
+                current = datetime(year, months[index % len(months)], 1)
+                continue
+            if self._day_matches(current):
+                index = bisect_left(self.hours, current.hour)
+                if index < len(self.hours):
+                    hour = self.hours[index]
+                    if hour == current.hour:
+                        minute_index = bisect_left(self.minutes, current.minute)
+                        if minute_index < len(self.minutes):
+                            return current.replace(minute=self.minutes[minute_index], tzinfo=tzinfo)
+                        index += 1
+                        if index == len(self.hours):
+                            current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+                            continue
+                        hour = self.hours[index]
+                    return current.replace(hour=hour, minute=self.minutes[0], tzinfo=tzinfo)
+            current = datetime(current.year, current.month, current.day) + timedelta(days=1)
+        return None
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+
+@lru_cache(maxsize=4096)
+def compile_cron(expression: str) -> CronExpression:
+    """ 相同表达式只解析一次；无效时抛出 ValueError """
+    return CronExpression(expression)
+
+
+def next_run_time(expression: Optional[str], after: datetime) -> Optional[datetime]:
+    if not expression:
+        return None
+    return compile_cron(expression).next_after(after)
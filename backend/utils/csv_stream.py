@@ -0,0 +1,71 @@
+import codecs
+import csv
+import io
+from itertools import islice
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 1000
+
+# 进度回调: (已处理行数, 已读取字节数, 文件总字节数)
+ProgressCallback = Callable[[int, int, Optional[int]], None]
+
+
+def _iter_lines(raw, encoding: str, chunk_size: int) -> Iterator[str]:
+    """ 按块读取上传文件并增量解码，只产出完整的行 """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    while True:
+        chunk = raw.read(chunk_size)
+        pending += decoder.decode(chunk, final=not chunk)
+        if not chunk:
+            break
+        cut = pending.rfind("\n")
+        if cut == -1:
+            continue
+        complete, pending = pending[:cut + 1], pending[cut + 1:]
+        yield from io.StringIO(complete, newline="")
+    if pending:
+        yield from io.StringIO(pending, newline="")
+
+
+def _file_size(raw) -> Optional[int]:
+    try:
+        position = raw.tell()
+        raw.seek(0, io.SEEK_END)
+        size = raw.tell()
+        raw.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+async def iter_csv_batches(
+    upload: UploadFile,
+    batch_size: int = BATCH_SIZE,
+    encoding: str = "utf-8-sig",
+    chunk_size: int = CHUNK_SIZE,
+    on_progress: Optional[ProgressCallback] = None,
+) -> AsyncIterator[List[Dict[str, str]]]:
+    """
+    流式解析上传的 CSV 文件
+    - 每次最多产出 batch_size 行，内存占用与文件大小无关
+    - 读取与解析在线程池中执行，不阻塞事件循环
+    """
+    raw = upload.file
+    await run_in_threadpool(raw.seek, 0)
+    total_bytes = await run_in_threadpool(_file_size, raw)
+
+    reader = csv.DictReader(_iter_lines(raw, encoding, chunk_size))
+    rows = 0
+    while True:
+        batch = await run_in_threadpool(lambda: list(islice(reader, batch_size)))
+        if not batch:
+            break
+        rows += len(batch)
+        if on_progress:
+            on_progress(rows, raw.tell(), total_bytes)
+        yield batch
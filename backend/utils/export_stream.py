@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import AsyncIterator, Sequence
+from uuid import UUID
+
+PREFETCH = 1000
+FLUSH_ROWS = 500
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+def _to_text(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def _json_default(value):
+    text = _to_text(value)
+    if text is value:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return text
+
+
+async def stream_query(
+    pool,
+    query: str,
+    *args,
+    fieldnames: Sequence[str],
+    fmt: str = "csv",
+    prefetch: int = PREFETCH,
+    flush_rows: int = FLUSH_ROWS,
+) -> AsyncIterator[bytes]:
+    """
+    在只读事务内用服务端游标逐批读取查询结果
+    - 按 CSV、NDJSON 或 JSON 数组编码，每 flush_rows 行产出一个块
+    - 首字节时间与峰值内存不随结果行数增长
+    """
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(fieldnames)
+    elif fmt == "json":
+        buffer.write("[")
+
+    async with pool.acquire() as conn:
+        async with conn.transaction(readonly=True):
+            pending = written = 0
+            async for record in conn.cursor(query, *args, prefetch=prefetch):
+                if fmt == "csv":
+                    writer.writerow(
+                        ["" if record[name] is None else _to_text(record[name]) for name in fieldnames]
+                    )
+                else:
+                    if fmt == "json" and written:
+                        buffer.write(",")
+                    buffer.write(json.dumps(
+                        {name: record[name] for name in fieldnames},
+                        default=_json_default,
+                        ensure_ascii=False,
+                    ))
+                    if fmt == "ndjson":
+                        buffer.write("\n")
+                written += 1
+                pending += 1
+                if pending >= flush_rows:
+                    yield buffer.getvalue().encode()
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+
+    if fmt == "json":
+        buffer.write("]")
+    if buffer.tell():
+        yield buffer.getvalue().encode()
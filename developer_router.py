@@ -5,6 +5,8 @@ import uuid
 import secrets
 from datetime import datetime
 from backend.db import get_pg_pool
+from backend.services.developer_keys import developer_key_cache
+from backend.services.quota import quota_meter
 
 router = APIRouter(prefix="/api/developer", tags=["developer"])
 
@@ -27,21 +29,34 @@ class DeveloperStats(BaseModel):
     is_developer: bool
 
 async def verify_developer_key(developer_api_key: str = Header(...)):
-    """Verify developer API key"""
+    """Verify developer API key (served from the in-process key cache)"""
     if not developer_api_key:
         raise HTTPException(status_code=401, detail="Developer API key required")
     
-    pool = await get_pg_pool()
-    async with pool.acquire() as connection:
-        developer = await connection.fetchrow(
-            "SELECT user_id FROM developer_settings WHERE developer_key = $1 AND is_developer = true",
-            developer_api_key
-        )
-        
-        if not developer:
-            raise HTTPException(status_code=401, detail="Invalid developer API key")
-        
-        return developer['user_id']
+    user_id = await developer_key_cache.lookup(developer_api_key)
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="Invalid developer API key")
+    
+    return user_id
+
+async def metered_developer_key(user_id: str = Depends(verify_developer_key)):
+    """Verify the developer API key and count the call against its quota
+    
+    Used by every developer-key endpoint except /stats, which stays
+    reachable when the quota is exhausted, and /increment-usage, which
+    meters the call itself.
+    """
+    try:
+        allowed, _, _ = await quota_meter.consume(user_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Developer settings not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if not allowed:
+        raise HTTPException(status_code=429, detail="API quota exceeded")
+    
+    return user_id
 
 @router.post("/register")
 async def register_as_developer(user_id: str):
@@ -80,6 +95,8 @@ async def register_as_developer(user_id: str):
                    VALUES ($1, $2, true, 10000, 0)""",
                 uuid.UUID(user_id), developer_key
             )
+            # Other workers are notified by the developer_settings trigger
+            developer_key_cache.invalidate_key(developer_key)
             
             return {
                 "message": "Developer registration successful",
@@ -108,20 +125,24 @@ async def get_developer_stats(user_id: str = Depends(verify_developer_key)):
             if not stats:
                 raise HTTPException(status_code=404, detail="Developer settings not found")
             
+            # Include calls this worker has counted but not flushed yet
+            api_usage = stats['api_usage'] + quota_meter.pending(user_id)
             return DeveloperStats(
                 api_quota=stats['api_quota'],
-                api_usage=stats['api_usage'],
-                remaining_quota=stats['api_quota'] - stats['api_usage'],
+                api_usage=api_usage,
+                remaining_quota=stats['api_quota'] - api_usage,
                 is_developer=stats['is_developer']
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.post("/api-keys", response_model=APIKeyResponse)
 async def create_api_key(
     api_key: APIKeyCreate, 
-    user_id: str = Depends(verify_developer_key)
+    user_id: str = Depends(metered_developer_key)
 ):
     """Create a new API key for a platform"""
     pool = await get_pg_pool()
@@ -153,7 +174,7 @@ async def create_api_key(
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.get("/api-keys", response_model=List[APIKeyResponse])
-async def get_api_keys(user_id: str = Depends(verify_developer_key)):
+async def get_api_keys(user_id: str = Depends(metered_developer_key)):
     """Get all API keys for the developer"""
     pool = await get_pg_pool()
     
@@ -171,7 +192,7 @@ async def get_api_keys(user_id: str = Depends(verify_developer_key)):
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.delete("/api-keys/{key_id}")
-async def delete_api_key(key_id: str, user_id: str = Depends(verify_developer_key)):
+async def delete_api_key(key_id: str, user_id: str = Depends(metered_developer_key)):
     """Delete an API key"""
     pool = await get_pg_pool()
     
@@ -199,7 +220,7 @@ async def delete_api_key(key_id: str, user_id: str = Depends(verify_developer_ke
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
 @router.post("/api-keys/{key_id}/toggle")
-async def toggle_api_key(key_id: str, user_id: str = Depends(verify_developer_key)):
+async def toggle_api_key(key_id: str, user_id: str = Depends(metered_developer_key)):
     """Toggle API key active status"""
     pool = await get_pg_pool()
     
@@ -233,36 +254,23 @@ async def toggle_api_key(key_id: str, user_id: str = Depends(verify_developer_ke
 
 @router.post("/increment-usage")
 async def increment_api_usage(user_id: str = Depends(verify_developer_key)):
-    """Increment API usage counter"""
-    pool = await get_pg_pool()
+    """Increment API usage counter
     
+    Usage is counted in-process and flushed to developer_settings in batches,
+    so this does not touch the database on the hot path.
+    """
     try:
-        async with pool.acquire() as connection:
-            # Get current usage and quota
-            current = await connection.fetchrow(
-                "SELECT api_usage, api_quota FROM developer_settings WHERE user_id = $1",
-                user_id
-            )
-            
-            if not current:
-                raise HTTPException(status_code=404, detail="Developer settings not found")
-            
-            if current['api_usage'] >= current['api_quota']:
-                raise HTTPException(status_code=429, detail="API quota exceeded")
-            
-            # Increment usage
-            new_usage = await connection.fetchval(
-                """UPDATE developer_settings 
-                   SET api_usage = api_usage + 1, updated_at = $1
-                   WHERE user_id = $2 RETURNING api_usage""",
-                datetime.utcnow(), user_id
-            )
-            
-            return {
-                "current_usage": new_usage,
-                "quota": current['api_quota'],
-                "remaining": current['api_quota'] - new_usage
-            }
-            
+        allowed, usage, quota = await quota_meter.consume(user_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Developer settings not found")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+    
+    if not allowed:
+        raise HTTPException(status_code=429, detail="API quota exceeded")
+    
+    return {
+        "current_usage": usage,
+        "quota": quota,
+        "remaining": quota - usage
+    }
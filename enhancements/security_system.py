@@ -4,10 +4,11 @@ import hashlib
 class SecurityEngine:
     def __init__(self):
         self.cipher_key = Fernet.generate_key()
+        self.cipher = Fernet(self.cipher_key)
         
     def encrypt_content(self, content: str) -> bytes:
         """ 兼容原仓库Post模型的加密方法 """
-        return Fernet(self.cipher_key).encrypt(content.encode())
+        return self.cipher.encrypt(content.encode())
     
     def generate_fingerprint(self, data: str) -> str:
         """ 用于追踪内容泄露 """
@@ -1,16 +1,103 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import List, Optional
-from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import asyncpg
-import os
+import base64
+import json
+import re
+from backend.db import get_pg_pool
+from backend.services.log_rollup import rebuild_system_log_rollups
+from backend.services.partitions import apply_retention
+from backend.services.log_sink import system_log_sink, system_log_record
+from backend.utils.cache import TTLCache
 from .models import LogEntry, LogFilter, LogResponse
 from .auth import get_current_user
 
 router = APIRouter(prefix="/api/logs", tags=["logs"])
 
 async def get_db_connection():
-    """获取数据库连接"""
-    return await asyncpg.connect(os.getenv("SUPABASE_DB_URL"))
+    """
+    从共享连接池获取数据库连接
+    - 作为依赖使用，请求结束（包括异常）时保证归还连接
+    """
+    pool = await get_pg_pool()
+    async with pool.acquire() as conn:
+        yield conn
+
+# 精确总数缓存: (查询条件, 参数) -> 总数
+_count_cache = TTLCache(maxsize=256, ttl=30)
+
+def encode_cursor(created_at: datetime, log_id: int) -> str:
+    """将 (created_at, log_id) 编码为不透明的游标"""
+    payload = json.dumps([created_at.isoformat(), log_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解析游标，格式错误时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(log_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+async def _count_logs(conn, where_clause: str, params: list, mode: str, filtered: bool) -> Optional[int]:
+    """
+    统计日志总数
+    - exact: COUNT(*)，结果缓存 30 秒
+    - estimate: 无筛选时读取 pg_class.reltuples，有筛选时取查询计划的估算行数
+    """
+    if mode == "none":
+        return None
+    
+    if mode == "exact":
+        cache_key = (where_clause, tuple(params))
+        total = _count_cache.get(cache_key)
+        if total is None:
+            total = await conn.fetchval(
+                f"SELECT COUNT(*) FROM system_logs WHERE {where_clause}", *params
+            )
+            _count_cache.set(cache_key, total)
+        return total
+    
+    if not filtered:
+        return await conn.fetchval("""
+            SELECT COALESCE(SUM(reltuples) FILTER (WHERE reltuples > 0), 0)::bigint
+            FROM pg_class
+            WHERE oid = 'system_logs'::regclass
+               OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = 'system_logs'::regclass)
+        """)
+    
+    plan = await conn.fetchval(
+        f"EXPLAIN (FORMAT JSON) SELECT 1 FROM system_logs WHERE {where_clause}", *params
+    )
+    return int(json.loads(plan)[0]["Plan"]["Plan Rows"])
+
+def build_search_condition(search: str, mode: str, param_index: int) -> Tuple[str, str]:
+    """
+    构建日志搜索条件，返回 (SQL 条件, 绑定参数)
+    - substring: ILIKE 子串匹配，由 pg_trgm GIN 索引支持
+    - phrase / prefix / websearch: 基于 search_vector 全文索引
+    """
+    param = f"${param_index}"
+    
+    if mode == "substring":
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return f"(message ILIKE {param} OR operation ILIKE {param})", f"%{escaped}%"
+    
+    if mode == "phrase":
+        return f"search_vector @@ phraseto_tsquery('simple', {param})", search
+    
+    if mode == "websearch":
+        return f"search_vector @@ websearch_to_tsquery('simple', {param})", search
+    
+    if mode == "prefix":
+        terms = re.findall(r"[^\W_]+", search)
+        if not terms:
+            raise ValueError("搜索关键词无效")
+        return f"search_vector @@ to_tsquery('simple', {param})", " & ".join(f"{term}:*" for term in terms)
+    
+    raise ValueError(f"不支持的搜索方式: {mode}")
 
 @router.get("/", response_model=LogResponse)
 async def get_logs(
@@ -20,16 +107,30 @@ async def get_logs(
     start_date: Optional[datetime] = Query(None),
     end_date: Optional[datetime] = Query(None),
     search: Optional[str] = Query(None, description="搜索关键词"),
-    current_user: dict = Depends(get_current_user)
+    search_mode: str = Query(
+        "substring",
+        pattern="^(substring|phrase|prefix|websearch)$",
+        description="搜索方式: substring 子串匹配, phrase 短语, prefix 前缀, websearch 搜索引擎语法"
+    ),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    count: str = Query("estimate", pattern="^(exact|estimate|none)$", description="总数统计方式"),
+    current_user: dict = Depends(get_current_user),
+    conn: asyncpg.Connection = Depends(get_db_connection)
 ):
     """
     获取系统日志
     - 支持分页、筛选、搜索
     - 按时间倒序返回
+    - 传入 cursor 时使用 (created_at, log_id) 键集分页，任意深度的页开销相同
     """
     try:
-        conn = await get_db_connection()
-        
+        after = decode_cursor(cursor) if cursor else None
+        if search:
+            build_search_condition(search, search_mode, 1)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
         # 构建查询条件
         conditions = ["1=1"]
         params = []
@@ -52,21 +153,26 @@ async def get_logs(
         
         if search:
             param_count += 1
-            conditions.append(f"(message ILIKE ${param_count} OR operation ILIKE ${param_count})")
-            params.extend([f"%{search}%", f"%{search}%"])
-            param_count += 1
+            condition, value = build_search_condition(search, search_mode, param_count)
+            conditions.append(condition)
+            params.append(value)
         
         where_clause = " AND ".join(conditions)
         
         # 获取总数
-        count_query = f"""
-            SELECT COUNT(*) FROM system_logs 
-            WHERE {where_clause}
-        """
-        total = await conn.fetchval(count_query, *params)
-        
-        # 获取日志数据
-        offset = (page - 1) * limit
+        total = await _count_logs(conn, where_clause, params, count, filtered=len(conditions) > 1)
+        
+        # 键集分页条件
+        page_params = list(params)
+        if after:
+            page_params.extend(after)
+            where_clause += f" AND (created_at, log_id) < (${param_count + 1}, ${param_count + 2})"
+            param_count += 2
+            offset = 0
+        else:
+            offset = (page - 1) * limit
+        
+        # 多取一条用于判断是否还有下一页
         param_count += 1
         limit_param = param_count
         param_count += 1
@@ -77,12 +183,14 @@ async def get_logs(
                    platform, ip_address, user_agent, created_at
             FROM system_logs 
             WHERE {where_clause}
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, log_id DESC
             LIMIT ${limit_param} OFFSET ${offset_param}
         """
-        params.extend([limit, offset])
+        page_params.extend([limit + 1, offset])
         
-        rows = await conn.fetch(logs_query, *params)
+        rows = await conn.fetch(logs_query, *page_params)
+        has_next = len(rows) > limit
+        rows = rows[:limit]
         
         logs = []
         for row in rows:
@@ -98,14 +206,18 @@ async def get_logs(
                 timestamp=row['created_at']
             ))
         
-        await conn.close()
+        next_cursor = None
+        if has_next and rows:
+            next_cursor = encode_cursor(rows[-1]['created_at'], rows[-1]['log_id'])
         
         return LogResponse(
             logs=logs,
             total=total,
+            total_is_estimate=count == "estimate",
             page=page,
             limit=limit,
-            has_next=page * limit < total
+            has_next=has_next,
+            next_cursor=next_cursor
         )
         
     except Exception as e:
@@ -114,23 +226,23 @@ async def get_logs(
 @router.get("/stats")
 async def get_log_stats(
     days: int = Query(7, ge=1, le=90),
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    conn: asyncpg.Connection = Depends(get_db_connection)
 ):
     """
     获取日志统计信息
     - 按级别统计数量
     - 按日期统计趋势
+    - 读取按小时汇总的 system_log_rollups，不扫描 system_logs
     """
     try:
-        conn = await get_db_connection()
-        
         start_date = datetime.now() - timedelta(days=days)
         
         # 按级别统计
         level_stats_query = """
-            SELECT log_level, COUNT(*) as count
-            FROM system_logs 
-            WHERE created_at >= $1
+            SELECT log_level, SUM(log_count)::bigint as count
+            FROM system_log_rollups 
+            WHERE bucket >= date_trunc('hour', $1::timestamptz)
             GROUP BY log_level
             ORDER BY count DESC
         """
@@ -138,30 +250,28 @@ async def get_log_stats(
         
         # 按日期统计
         daily_stats_query = """
-            SELECT DATE(created_at) as date, 
-                   COUNT(*) as total,
-                   COUNT(*) FILTER (WHERE log_level = 'ERROR') as errors,
-                   COUNT(*) FILTER (WHERE log_level = 'WARNING') as warnings
-            FROM system_logs 
-            WHERE created_at >= $1
-            GROUP BY DATE(created_at)
+            SELECT DATE(bucket) as date, 
+                   SUM(log_count)::bigint as total,
+                   COALESCE(SUM(log_count) FILTER (WHERE log_level = 'ERROR'), 0)::bigint as errors,
+                   COALESCE(SUM(log_count) FILTER (WHERE log_level = 'WARNING'), 0)::bigint as warnings
+            FROM system_log_rollups 
+            WHERE bucket >= date_trunc('hour', $1::timestamptz)
+            GROUP BY DATE(bucket)
             ORDER BY date DESC
         """
         daily_stats = await conn.fetch(daily_stats_query, start_date)
         
         # 最近活跃用户
         user_stats_query = """
-            SELECT user_account, COUNT(*) as operations
-            FROM system_logs 
-            WHERE created_at >= $1 AND user_account IS NOT NULL
+            SELECT user_account, SUM(log_count)::bigint as operations
+            FROM system_log_rollups 
+            WHERE bucket >= date_trunc('hour', $1::timestamptz) AND user_account <> ''
             GROUP BY user_account
             ORDER BY operations DESC
             LIMIT 10
         """
         user_stats = await conn.fetch(user_stats_query, start_date)
         
-        await conn.close()
-        
         return {
             "period_days": days,
             "level_stats": [dict(row) for row in level_stats],
@@ -175,11 +285,14 @@ async def get_log_stats(
 @router.delete("/cleanup")
 async def cleanup_logs(
     days: int = Query(30, ge=1),
-    current_user: dict = Depends(get_current_user)
+    mode: str = Query("partition", pattern="^(partition|delete)$", description="partition 按分区删除, delete 逐行删除"),
+    current_user: dict = Depends(get_current_user),
+    conn: asyncpg.Connection = Depends(get_db_connection)
 ):
     """
     清理旧日志
-    - 删除指定天数之前的日志
+    - partition: 删除整个过期的日分区，截止时间向下取整到分区边界
+    - delete: 逐行删除指定天数之前的日志（包括默认分区中的数据）
     - 需要管理员权限
     """
     # 检查管理员权限
@@ -187,19 +300,20 @@ async def cleanup_logs(
         raise HTTPException(status_code=403, detail="需要管理员权限")
     
     try:
-        conn = await get_db_connection()
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
-        
-        delete_query = """
-            DELETE FROM system_logs 
-            WHERE created_at < $1
-        """
-        
-        result = await conn.execute(delete_query, cutoff_date)
-        deleted_count = int(result.split()[-1])
-        
-        await conn.close()
+        cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+        dropped_partitions = []
+        
+        if mode == "partition":
+            # 默认分区只保存落在预建分区之外的少量数据，其中过期的逐行清理
+            cutoff_date, dropped_partitions, deleted_count = await apply_retention(conn, "system_logs", cutoff_date)
+        else:
+            delete_query = """
+                DELETE FROM system_logs 
+                WHERE created_at < $1
+            """
+            
+            result = await conn.execute(delete_query, cutoff_date)
+            deleted_count = int(result.split()[-1])
         
         # 记录清理操作
         await log_operation(
@@ -212,12 +326,36 @@ async def cleanup_logs(
         return {
             "message": f"成功清理 {deleted_count} 条日志",
             "cutoff_date": cutoff_date,
-            "deleted_count": deleted_count
+            "deleted_count": deleted_count,
+            "deleted_count_is_estimate": bool(dropped_partitions),
+            "dropped_partitions": dropped_partitions
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"清理日志失败: {str(e)}")
 
+@router.post("/rollups/rebuild")
+async def rebuild_log_rollups(
+    days: int = Query(7, ge=1, le=366),
+    current_user: dict = Depends(get_current_user),
+    conn: asyncpg.Connection = Depends(get_db_connection)
+):
+    """
+    从 system_logs 重新汇总最近 days 天的按小时统计
+    - 启动时汇总表为空会自动回填；这里用于修正绕过 log sink 直接写入的日志
+    - 需要管理员权限
+    """
+    if not current_user.get("is_admin", False):
+        raise HTTPException(status_code=403, detail="需要管理员权限")
+    
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        await rebuild_system_log_rollups(conn, since)
+        return {"message": "日志统计已重建", "since": since}
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"重建日志统计失败: {str(e)}")
+
 async def log_operation(
     level: str,
     operation: str, 
@@ -229,29 +367,9 @@ async def log_operation(
 ):
     """
     记录系统操作日志
+    - 写入进程内队列，由 system_log_sink 后台批量入库
     """
-    try:
-        conn = await get_db_connection()
-        
-        insert_query = """
-            INSERT INTO system_logs 
-            (log_level, operation, message, user_account, platform, ip_address, user_agent)
-            VALUES ($1, $2, $3, $4, $5, $6, $7)
-        """
-        
-        await conn.execute(
-            insert_query,
-            level.upper(),
-            operation,
-            message,
-            user_account,
-            platform,
-            ip_address,
-            user_agent
-        )
-        
-        await conn.close()
-        
-    except Exception as e:
-        # 日志记录失败不应该影响主业务
-        print(f"日志记录失败: {str(e)}")
\ No newline at end of file
+    # 日志记录失败不应该影响主业务，队列满时由 sink 丢弃并计数
+    system_log_sink.emit(system_log_record(
+        level, operation, message, user_account, platform, ip_address, user_agent
+    ))
\ No newline at end of file
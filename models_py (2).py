@@ -3,6 +3,8 @@ from typing import Optional, List, Dict, Any, Union
 from datetime import datetime, date
 from enum import Enum
 
+from backend.utils.cron import compile_cron
+
 # 枚举类型定义
 class PlatformType(str, Enum):
     """支持的社交平台类型"""
@@ -195,6 +197,15 @@ class ContentResponse(BaseModel):
     updated_at: Optional[datetime]
 
 # 自动化任务相关模型
+def _validate_cron(v: Optional[str]) -> Optional[str]:
+    """完整解析cron表达式（解析结果会被缓存，调度时不再重复解析）"""
+    if v:
+        try:
+            compile_cron(v)
+        except ValueError as e:
+            raise ValueError(f'无效的cron表达式格式: {e}')
+    return v
+
 class AutomationTask(BaseModel):
     """自动化任务模型"""
     task_id: Optional[int] = None
@@ -225,9 +236,7 @@ class AutomationTaskCreate(BaseModel):
     @validator('cron_expression')
     def validate_cron(cls, v):
         """验证cron表达式格式"""
-        if v and len(v.split()) != 5:
-            raise ValueError('无效的cron表达式格式')
-        return v
+        return _validate_cron(v)
 
 class AutomationTaskUpdate(BaseModel):
     """自动化任务更新模型"""
@@ -236,6 +245,11 @@ class AutomationTaskUpdate(BaseModel):
     is_active: Optional[bool] = None
     cron_expression: Optional[str] = None
 
+    @validator('cron_expression')
+    def validate_cron(cls, v):
+        """验证cron表达式格式"""
+        return _validate_cron(v)
+
 class AutomationTaskResponse(BaseModel):
     """自动化任务响应模型"""
     task_id: int
@@ -280,10 +294,12 @@ class LogFilter(BaseModel):
 class LogResponse(BaseModel):
     """日志响应模型"""
     logs: List[LogEntry]
-    total: int
+    total: Optional[int] = Field(None, description="总数，count=none 时为空")
+    total_is_estimate: bool = Field(False, description="总数是否为估算值")
     page: int
     limit: int
     has_next: bool
+    next_cursor: Optional[str] = Field(None, description="下一页游标")
 
 # 统计相关模型
 class PlatformStats(BaseModel):
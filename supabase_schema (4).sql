@@ -4,6 +4,7 @@
 -- Enable necessary extensions
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 
 -- Tenants table for multi-tenancy
 CREATE TABLE tenants (
@@ -53,6 +54,7 @@ CREATE TABLE social_accounts (
     platform_id UUID REFERENCES platforms(id) ON DELETE CASCADE,
     account_name VARCHAR(100) NOT NULL,
     account_handle VARCHAR(100),
+    account_id VARCHAR(255), -- Account/page id on the platform, used by the publishing adapters
     access_token TEXT,
     refresh_token TEXT,
     token_expires_at TIMESTAMP WITH TIME ZONE,
@@ -106,11 +108,13 @@ CREATE TABLE scheduled_posts (
     content TEXT NOT NULL,
     media_urls JSONB DEFAULT '[]'::jsonb,
     scheduled_time TIMESTAMP WITH TIME ZONE NOT NULL,
-    status VARCHAR(20) DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'published', 'failed', 'cancelled')),
+    status VARCHAR(20) DEFAULT 'scheduled' CHECK (status IN ('scheduled', 'publishing', 'published', 'failed', 'cancelled')),
     target_accounts JSONB NOT NULL, -- Array of social_account IDs
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    claimed_at TIMESTAMP WITH TIME ZONE, -- Set while a dispatcher is publishing the post
     published_at TIMESTAMP WITH TIME ZONE,
+    published_targets JSONB DEFAULT '{}'::jsonb, -- social_account ID -> platform post ID; skipped when a failed post is rescheduled
     error_message TEXT
 );
 
@@ -133,6 +137,27 @@ CREATE TABLE automation_rules (
     execution_count INTEGER DEFAULT 0
 );
 
+-- Automation tasks (cron driven)
+CREATE TABLE automation_tasks (
+    task_id BIGSERIAL PRIMARY KEY,
+    tenant_id UUID REFERENCES tenants(id) ON DELETE CASCADE,
+    task_name VARCHAR(200) NOT NULL,
+    task_type VARCHAR(50) NOT NULL,
+    platform VARCHAR(50) NOT NULL,
+    user_account TEXT NOT NULL,
+    config JSONB DEFAULT '{}'::jsonb,
+    status VARCHAR(20) DEFAULT 'pending' CHECK (status IN ('pending', 'running', 'completed', 'failed', 'cancelled')),
+    is_active BOOLEAN DEFAULT true,
+    cron_expression VARCHAR(100),
+    next_run_time TIMESTAMP WITH TIME ZONE, -- Precomputed from cron_expression; NULL means never due
+    last_run_time TIMESTAMP WITH TIME ZONE,
+    run_count INTEGER DEFAULT 0,
+    success_count INTEGER DEFAULT 0,
+    error_message TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
 -- Analytics and metrics
 CREATE TABLE analytics (
     id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
@@ -145,9 +170,11 @@ CREATE TABLE analytics (
     metadata JSONB DEFAULT '{}'::jsonb
 );
 
--- Activity logs
+-- Activity logs (range-partitioned by month; partitions are created and, after
+-- ACTIVITY_LOG_RETENTION_DAYS, dropped by backend/services/partitions.py;
+-- rows outside them land in the default partition)
 CREATE TABLE activity_logs (
-    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    id UUID NOT NULL DEFAULT uuid_generate_v4(),
     tenant_id UUID REFERENCES tenants(id) ON DELETE CASCADE,
     user_id UUID REFERENCES users(id),
     action VARCHAR(50) NOT NULL,
@@ -156,7 +183,39 @@ CREATE TABLE activity_logs (
     details JSONB DEFAULT '{}'::jsonb,
     ip_address INET,
     user_agent TEXT,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE activity_logs_default PARTITION OF activity_logs DEFAULT;
+
+-- System operation logs (written by the logs router; range-partitioned by day,
+-- retention drops whole partitions)
+CREATE TABLE system_logs (
+    log_id BIGSERIAL,
+    log_level VARCHAR(10) NOT NULL,
+    operation VARCHAR(100) NOT NULL,
+    message TEXT NOT NULL,
+    user_account VARCHAR(100),
+    platform VARCHAR(50),
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    search_vector TSVECTOR GENERATED ALWAYS AS (
+        to_tsvector('simple', coalesce(operation, '') || ' ' || coalesce(message, ''))
+    ) STORED,
+    PRIMARY KEY (log_id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE system_logs_default PARTITION OF system_logs DEFAULT;
+
+-- Hourly log counts maintained by the log writer (read by /api/logs/stats)
+CREATE TABLE system_log_rollups (
+    bucket TIMESTAMP WITH TIME ZONE NOT NULL,
+    log_level VARCHAR(10) NOT NULL,
+    user_account VARCHAR(100) NOT NULL DEFAULT '',
+    log_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, log_level, user_account)
 );
 
 -- Insert default platforms
@@ -166,7 +225,41 @@ INSERT INTO platforms (name, display_name, api_endpoint, auth_type, config) VALU
 ('instagram', 'Instagram', 'https://graph.instagram.com/', 'oauth', '{"api_version": "v18.0"}'),
 ('linkedin', 'LinkedIn', 'https://api.linkedin.com/v2/', 'oauth', '{"api_version": "v2"}'),
 ('tiktok', 'TikTok', 'https://open-api.tiktok.com/', 'oauth', '{"api_version": "v1"}'),
-('youtube', 'YouTube', 'https://www.googleapis.com/youtube/v3/', 'oauth', '{"api_version": "v3"}');
+('youtube', 'YouTube', 'https://www.googleapis.com/youtube/v3/', 'oauth', '{"api_version": "v3"}'),
+('wechat', 'WeChat', 'https://api.weixin.qq.com/', 'token', '{}');
+
+-- Notify post dispatchers when a post is (re)scheduled so they can add it to their in-memory queue
+CREATE OR REPLACE FUNCTION notify_scheduled_post_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status = 'scheduled' THEN
+        PERFORM pg_notify('scheduled_posts', NEW.id::text || ' ' || extract(epoch FROM NEW.scheduled_time)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER scheduled_posts_schedule_change
+    AFTER INSERT OR UPDATE OF scheduled_time, status ON scheduled_posts
+    FOR EACH ROW EXECUTE FUNCTION notify_scheduled_post_change();
+
+-- Changing a task's cron expression or re-activating it clears next_run_time so the scheduler recomputes it;
+-- one-off tasks without a cron expression and updates that set next_run_time themselves are left alone
+CREATE OR REPLACE FUNCTION reset_automation_task_schedule()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.cron_expression IS NOT NULL
+       AND (NEW.cron_expression IS DISTINCT FROM OLD.cron_expression OR NEW.is_active IS DISTINCT FROM OLD.is_active)
+       AND NEW.next_run_time IS NOT DISTINCT FROM OLD.next_run_time THEN
+        NEW.next_run_time := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER automation_tasks_schedule_change
+    BEFORE UPDATE OF cron_expression, is_active ON automation_tasks
+    FOR EACH ROW EXECUTE FUNCTION reset_automation_task_schedule();
 
 -- Create indexes for better performance
 CREATE INDEX idx_users_tenant_id ON users(tenant_id);
@@ -176,10 +269,23 @@ CREATE INDEX idx_social_accounts_user_id ON social_accounts(user_id);
 CREATE INDEX idx_scheduled_posts_tenant_id ON scheduled_posts(tenant_id);
 CREATE INDEX idx_scheduled_posts_scheduled_time ON scheduled_posts(scheduled_time);
 CREATE INDEX idx_scheduled_posts_status ON scheduled_posts(status);
+-- Dispatcher claim queue: only posts still waiting to be published
+CREATE INDEX idx_scheduled_posts_due ON scheduled_posts(scheduled_time) WHERE status = 'scheduled';
+CREATE INDEX idx_scheduled_posts_claimed_at ON scheduled_posts(claimed_at) WHERE status = 'publishing';
+-- Due automation tasks are read in next_run_time order instead of evaluating every cron expression
+CREATE INDEX idx_automation_tasks_due ON automation_tasks(is_active, next_run_time);
+-- Tasks still waiting for their first next_run_time; checked on every scheduler poll
+CREATE INDEX idx_automation_tasks_unscheduled ON automation_tasks(task_id)
+    WHERE next_run_time IS NULL AND is_active = true AND cron_expression IS NOT NULL;
 CREATE INDEX idx_analytics_social_account_id ON analytics(social_account_id);
 CREATE INDEX idx_analytics_recorded_at ON analytics(recorded_at);
 CREATE INDEX idx_activity_logs_tenant_id ON activity_logs(tenant_id);
 CREATE INDEX idx_activity_logs_created_at ON activity_logs(created_at);
+CREATE INDEX idx_system_logs_created_at_log_id ON system_logs(created_at DESC, log_id DESC);
+CREATE INDEX idx_system_logs_level_created_at ON system_logs(log_level, created_at DESC, log_id DESC);
+CREATE INDEX idx_system_logs_message_trgm ON system_logs USING GIN (message gin_trgm_ops);
+CREATE INDEX idx_system_logs_operation_trgm ON system_logs USING GIN (operation gin_trgm_ops);
+CREATE INDEX idx_system_logs_search_vector ON system_logs USING GIN (search_vector);
 
 -- Row Level Security (RLS) policies
 ALTER TABLE tenants ENABLE ROW LEVEL SECURITY;
@@ -189,6 +295,7 @@ ALTER TABLE api_keys ENABLE ROW LEVEL SECURITY;
 ALTER TABLE content_templates ENABLE ROW LEVEL SECURITY;
 ALTER TABLE scheduled_posts ENABLE ROW LEVEL SECURITY;
 ALTER TABLE automation_rules ENABLE ROW LEVEL SECURITY;
+ALTER TABLE automation_tasks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE analytics ENABLE ROW LEVEL SECURITY;
 ALTER TABLE activity_logs ENABLE ROW LEVEL SECURITY;
 
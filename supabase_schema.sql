@@ -95,6 +95,25 @@ CREATE TABLE IF NOT EXISTS developer_settings (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Notify API workers when a developer key changes so their key caches drop it
+CREATE OR REPLACE FUNCTION notify_developer_key_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.developer_key IS NOT NULL THEN
+        PERFORM pg_notify('developer_keys', encode(sha256(convert_to(OLD.developer_key, 'UTF8')), 'hex'));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.developer_key IS NOT NULL
+       AND (TG_OP = 'INSERT' OR NEW.developer_key IS DISTINCT FROM OLD.developer_key) THEN
+        PERFORM pg_notify('developer_keys', encode(sha256(convert_to(NEW.developer_key, 'UTF8')), 'hex'));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER developer_settings_key_change
+    AFTER INSERT OR DELETE OR UPDATE OF developer_key, is_developer ON developer_settings
+    FOR EACH ROW EXECUTE FUNCTION notify_developer_key_change();
+
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_account_platform ON users(user_account, user_platform);
 CREATE INDEX IF NOT EXISTS idx_api_keys_user_id ON api_keys(user_id);
@@ -0,0 +1,44 @@
+import asyncio
+
+import pytest
+
+from auth_module import PasswordHasher, SupabaseAuth
+
+
+@pytest.fixture
+def auth():
+    # Password helpers only; no supabase client needed
+    manager = SupabaseAuth.__new__(SupabaseAuth)
+    manager.password_hasher = PasswordHasher(iterations=2000, max_workers=1)
+    yield manager
+    manager.password_hasher.close()
+
+
+def test_verify_password_hash_rejects_wrong_password(auth):
+    password_hash, salt = auth.hash_password("correct horse")
+    assert auth.verify_password_hash("correct horse", password_hash, salt) is True
+    assert auth.verify_password_hash("wrong horse", password_hash, salt) is False
+
+
+def test_verify_password_async_rejects_wrong_password(auth):
+    encoded = asyncio.run(auth.hash_password_async("correct horse"))
+    assert asyncio.run(auth.verify_password_async("correct horse", encoded)) is True
+    assert asyncio.run(auth.verify_password_async("wrong horse", encoded)) is False
+
+
+def test_verify_and_rehash_upgrades_legacy_and_weak_hashes(auth):
+    password_hash, salt = auth.hash_password("correct horse")
+    assert asyncio.run(auth.verify_and_rehash("wrong horse", password_hash, salt)) == (False, None)
+
+    valid, new_hash = asyncio.run(auth.verify_and_rehash("correct horse", password_hash, salt))
+    # The legacy pair costs 100000 iterations, more than this hasher's target, so no upgrade
+    assert valid is True and new_hash is None
+
+    weak = PasswordHasher(iterations=1000, max_workers=1)
+    try:
+        encoded = asyncio.run(weak.hash("correct horse"))
+    finally:
+        weak.close()
+    valid, new_hash = asyncio.run(auth.verify_and_rehash("correct horse", encoded))
+    assert valid is True and new_hash.startswith("pbkdf2_sha256$2000$")
+    assert asyncio.run(auth.verify_password_async("correct horse", new_hash)) is True
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from backend.utils import auth
+
+SECRET = "test-secret-with-enough-length-for-hs256"
+
+
+@pytest.fixture
+def hs256(monkeypatch):
+    monkeypatch.setattr(auth, "_hs256_key", jwk.construct(SECRET, "HS256"))
+
+
+def token(**claims):
+    return jwt.encode({"sub": "user-1", "aud": "authenticated", **claims}, SECRET, algorithm="HS256")
+
+
+def test_token_with_expiry_is_accepted(hs256):
+    claims = asyncio.run(auth.verify_access_token(token(exp=int(time.time()) + 60)))
+    assert claims["sub"] == "user-1"
+
+
+def test_token_without_expiry_is_rejected(hs256):
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(auth.verify_access_token(token()))
+    assert info.value.status_code == 401
+
+
+def test_expired_token_is_rejected(hs256):
+    with pytest.raises(HTTPException):
+        asyncio.run(auth.verify_access_token(token(exp=int(time.time()) - 60)))
+
+
+RSA_JWK = {
+    "kty": "RSA", "alg": "RS256", "kid": "good", "e": "AQAB",
+    "n": "0vx7agoebGcQSuuPiLJXZptN9nndrQmbXEps2aiAFbWhM78LhWx4cbbfAAtVT86zwu1RK7aPFFxuhDR1L6tSoc_BJECPebWKRXjBZCiFV4n3oknjhMstn64tZ_2W-5JsGY4Hc5n9yBXArwl93lqt7_RN5w6Cf0h4QyQ5v-65YGjQR0_FDW2QvzqY368QQMicAtaSqzs8KJZgnYb9c7d0zgdAZHzu6qMQvRL5hajrn1n91CbOpbISD08qNLyrdkt-bFTWhAI4vMQFh6WeZu0fM4lFd2NcRwr3XPksINHaQ-G_xBniIqbw0Ls1jF44-csFCur-kEgU8awapJzKnqDKgw",
+}
+
+
+def fake_jwks(monkeypatch, *responses):
+    responses = iter(responses)
+    original = httpx.AsyncClient
+
+    def handler(request):
+        return next(responses)
+
+    monkeypatch.setattr(
+        auth.httpx, "AsyncClient",
+        lambda **kwargs: original(transport=httpx.MockTransport(handler), **kwargs),
+    )
+
+
+def test_jwks_refresh_skips_malformed_keys(monkeypatch):
+    broken = {"kty": "RSA", "alg": "RS256", "kid": "broken", "n": "!!", "e": "AQAB"}
+    fake_jwks(monkeypatch, httpx.Response(200, json={"keys": [broken, RSA_JWK, "junk"]}))
+    cache = auth.JWKSCache("https://example.test/jwks.json")
+    assert asyncio.run(cache.get_key("good")) is not None
+    assert asyncio.run(cache.get_key("broken")) is None
+
+
+def test_jwks_refresh_failure_keeps_previous_keys(monkeypatch):
+    fake_jwks(
+        monkeypatch,
+        httpx.Response(200, json={"keys": [RSA_JWK]}),
+        httpx.Response(500),
+        httpx.Response(200, text="not json"),
+        httpx.Response(200, json={"keys": [{"kty": "RSA", "alg": "RS256", "kid": "x", "n": "!!"}]}),
+    )
+    cache = auth.JWKSCache("https://example.test/jwks.json", ttl=0, min_refresh_interval=0)
+
+    async def run():
+        return [await cache.get_key("good") for _ in range(4)]
+
+    assert all(key is not None for key in asyncio.run(run()))
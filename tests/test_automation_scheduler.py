@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from backend.services import automation_scheduler as scheduler_module
+from backend.services.automation_scheduler import AutomationScheduler
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def fetch(self, sql, *args):
+        self.calls.append(("fetch", args))
+        return self.rows
+
+    async def execute(self, sql, *args):
+        self.calls.append(("execute", args))
+
+
+def use_connection(monkeypatch, conn):
+    class Pool:
+        @asynccontextmanager
+        async def acquire(self):
+            yield conn
+
+    async def get_pg_pool():
+        return Pool()
+
+    monkeypatch.setattr(scheduler_module, "get_pg_pool", get_pg_pool)
+
+
+def test_claim_without_handlers_does_not_touch_the_database(monkeypatch):
+    conn = FakeConnection([])
+    use_connection(monkeypatch, conn)
+    assert asyncio.run(AutomationScheduler().claim()) == []
+    assert conn.calls == []
+
+
+def test_claim_only_asks_for_registered_task_types(monkeypatch):
+    row = {
+        "task_id": 1, "task_name": "n", "task_type": "post", "platform": "facebook", "user_account": "a",
+        "config": '{"k": 1}', "cron_expression": "*/5 * * * *", "next_run_time": None,
+    }
+    conn = FakeConnection([row])
+    use_connection(monkeypatch, conn)
+    scheduler = AutomationScheduler(batch_size=10)
+
+    @scheduler.register("post")
+    async def handle(task):
+        pass
+
+    tasks = asyncio.run(scheduler.claim())
+    assert conn.calls[0] == ("fetch", (10, ["post"]))
+    assert tasks[0]["config"] == {"k": 1}
+    # 同一事务内推进 next_run_time
+    kind, (task_ids, next_runs, _) = conn.calls[1]
+    assert kind == "execute" and task_ids == [1] and next_runs[0] is not None
+
+
+def test_schedule_pending_disables_tasks_that_cannot_be_scheduled(monkeypatch):
+    rows = [
+        {"task_id": 1, "cron_expression": "*/5 * * * *"},
+        {"task_id": 2, "cron_expression": "not a cron"},
+        {"task_id": 3, "cron_expression": "0 0 31 2 *"},
+    ]
+    conn = FakeConnection(rows)
+    pages = iter([rows, []])
+
+    async def fetch(sql, *args):
+        conn.calls.append(("fetch", args))
+        return next(pages)
+
+    conn.fetch = fetch
+    use_connection(monkeypatch, conn)
+    scheduler = AutomationScheduler()
+
+    assert asyncio.run(scheduler.schedule_pending()) == 1
+    executes = [args for kind, args in conn.calls if kind == "execute"]
+    scheduled_ids, _ = executes[0]
+    disabled_ids, reasons = executes[1]
+    assert scheduled_ids == [1]
+    assert disabled_ids == [2, 3] and all(reasons)
+    assert scheduler.stats["disabled"] == 2
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.utils.cron import CronExpression, compile_cron, next_run_time
+
+
+def nxt(expression, after):
+    return CronExpression(expression).next_after(after)
+
+
+def reference_field(text, low, high):
+    """ 独立于 backend.utils.cron 的简单字段解析，只支持数字、* , - / """
+    values = set()
+    for part in text.split(","):
+        span, _, step = part.partition("/")
+        if span == "*":
+            start, end = low, high
+        elif "-" in span:
+            start, end = map(int, span.split("-"))
+        else:
+            start = int(span)
+            end = high if step else start
+        values.update(range(start, end + 1, int(step or 1)))
+    return values
+
+
+def brute_force(expression, after, limit_minutes=60 * 24 * 800):
+    """ 逐分钟检查的参照实现，日/周组合规则按 Vixie cron 单独实现 """
+    minute, hour, day, month, weekday = expression.split()
+    minutes, hours = reference_field(minute, 0, 59), reference_field(hour, 0, 23)
+    days, months = reference_field(day, 1, 31), reference_field(month, 1, 12)
+    weekdays = {value % 7 for value in reference_field(weekday, 0, 7)}
+    star = day.startswith("*") or weekday.startswith("*")
+    current = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    for _ in range(limit_minutes):
+        day_ok = current.day in days
+        # Python 的 weekday() 周一为 0，cron 周日为 0
+        weekday_ok = (current.weekday() + 1) % 7 in weekdays
+        if (
+            current.minute in minutes
+            and current.hour in hours
+            and current.month in months
+            and ((day_ok and weekday_ok) if star else (day_ok or weekday_ok))
+        ):
+            return current
+        current += timedelta(minutes=1)
+    return None
+
+
+@pytest.mark.parametrize("expression, after, expected", [
+    ("*/15 * * * *", datetime(2024, 1, 1, 10, 7), datetime(2024, 1, 1, 10, 15)),
+    ("0 9 * * 1-5", datetime(2024, 1, 5, 9, 0), datetime(2024, 1, 8, 9, 0)),
+    ("30 23 31 * *", datetime(2024, 4, 1), datetime(2024, 5, 31, 23, 30)),
+    ("0 0 29 2 *", datetime(2023, 3, 1), datetime(2024, 2, 29, 0, 0)),
+    ("@hourly", datetime(2024, 1, 1, 10, 59, 59), datetime(2024, 1, 1, 11, 0)),
+    ("0 12 * jan,jul sun", datetime(2024, 2, 1), datetime(2024, 7, 7, 12, 0)),
+    ("0 0 * * 7", datetime(2024, 1, 1), datetime(2024, 1, 7, 0, 0)),
+    ("59 23 31 12 *", datetime(2024, 12, 31, 23, 59), datetime(2025, 12, 31, 23, 59)),
+])
+def test_next_after(expression, after, expected):
+    assert nxt(expression, after) == expected
+
+
+def test_day_of_month_and_weekday_are_combined_with_or():
+    # 每月 13 日或每个周五
+    after = datetime(2024, 9, 1)
+    assert nxt("0 0 13 * 5", after) == datetime(2024, 9, 6)
+    assert nxt("0 0 13 * 5", datetime(2024, 9, 12)) == datetime(2024, 9, 13)
+
+
+def test_star_prefixed_day_field_is_combined_with_and():
+    # "*/2" 以 * 开头：单数日且是周一
+    assert nxt("0 0 */2 * 1", datetime(2024, 1, 1)) == datetime(2024, 1, 15)
+    # 周字段以 * 开头同样取交集：1-7 日中的周日、周三、周六
+    assert nxt("0 0 1-7 * */3", datetime(2024, 1, 1)) == datetime(2024, 1, 3)
+
+
+def test_result_is_strictly_later_and_keeps_timezone():
+    after = datetime(2024, 1, 1, 10, 15, tzinfo=timezone.utc)
+    result = nxt("*/15 * * * *", after)
+    assert result == datetime(2024, 1, 1, 10, 30, tzinfo=timezone.utc)
+    assert result.tzinfo is timezone.utc
+
+
+@pytest.mark.parametrize("expression", [
+    "*/7 3-5 * * *", "0 0 1,15 * 1", "5 4 * 2 *", "0 */6 10-20/5 * 1-3", "0 0 * * 0", "0 0 1 * *",
+    "0 0 */2 * 1", "30 12 1-7 * */3", "0 9 13 * 5", "0 0 */10 */2 7",
+])
+def test_matches_brute_force(expression):
+    after = datetime(2024, 1, 30, 22, 41)
+    for _ in range(20):
+        expected = brute_force(expression, after)
+        assert nxt(expression, after) == expected
+        after = expected
+
+
+@pytest.mark.parametrize("expression", [
+    "", "* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *",
+    "*/0 * * * *", "5-1 * * * *", "* * * foo *", "0 0 30 2 *", "a b c d e",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_compile_cron_caches_and_next_run_time_handles_empty():
+    assert compile_cron("0 * * * *") is compile_cron("0 * * * *")
+    assert next_run_time(None, datetime(2024, 1, 1)) is None
+    assert next_run_time("", datetime(2024, 1, 1)) is None
+    assert next_run_time("0 * * * *", datetime(2024, 1, 1, 0, 30)) == datetime(2024, 1, 1, 1, 0)
@@ -0,0 +1,85 @@
+import asyncio
+
+import httpx
+import pytest
+
+from backend.platform_api.base import PlatformBase, PlatformError
+from backend.platform_api.facebook import FacebookPlatform
+
+
+def run_with_transport(handler, coroutine_factory):
+    async def run():
+        await PlatformBase.configure_transport(httpx.MockTransport(handler))
+        try:
+            return await coroutine_factory()
+        finally:
+            await PlatformBase.configure_transport(None)
+
+    return asyncio.run(run())
+
+
+def test_request_returns_json_body():
+    def handler(request):
+        assert request.url.path.endswith("/page-1/feed")
+        return httpx.Response(200, json={"id": "post-1"})
+
+    result = run_with_transport(
+        handler, lambda: FacebookPlatform().publish({"text_content": "hi"}, {"account_id": "page-1"})
+    )
+    assert result == {"platform": "facebook", "post_id": "post-1"}
+
+
+def test_non_json_success_body_raises_platform_error():
+    def handler(request):
+        return httpx.Response(200, text="<html>gateway</html>")
+
+    with pytest.raises(PlatformError) as info:
+        run_with_transport(handler, lambda: FacebookPlatform()._request("GET", "/me"))
+    assert info.value.status_code == 200
+    assert info.value.retryable is False
+
+
+def test_error_status_is_retryable_only_for_throttling_and_server_errors():
+    statuses = iter([429, 503, 400])
+
+    def handler(request):
+        return httpx.Response(next(statuses), text="nope")
+
+    async def run():
+        errors = []
+        for _ in range(3):
+            try:
+                await FacebookPlatform()._request("GET", "/me")
+            except PlatformError as e:
+                errors.append((e.status_code, e.retryable))
+        return errors
+
+    assert run_with_transport(handler, run) == [(429, True), (503, True), (400, False)]
+
+
+def test_network_error_is_retryable():
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    with pytest.raises(PlatformError) as info:
+        run_with_transport(handler, lambda: FacebookPlatform()._request("GET", "/me"))
+    assert info.value.retryable is True
+
+
+def test_publish_batch_isolates_bad_responses():
+    def handler(request):
+        message = dict(httpx.QueryParams(request.content.decode()))["message"]
+        if message == "html":
+            return httpx.Response(200, text="<html></html>")
+        if message == "down":
+            return httpx.Response(502)
+        return httpx.Response(200, json={"id": message})
+
+    items = [({"text_content": text}, {"account_id": "page"}) for text in ("a", "html", "down", "b")]
+    results = run_with_transport(handler, lambda: FacebookPlatform().publish_batch(items))
+
+    assert [r["success"] for r in results] == [True, False, False, True]
+    assert results[0]["result"]["post_id"] == "a"
+    assert results[1]["retryable"] is False
+    assert results[2]["retryable"] is True
+    assert results[3]["result"]["post_id"] == "b"
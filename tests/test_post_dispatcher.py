@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+from backend.services.post_dispatcher import PostDispatcher
+
+
+class FakePublisher:
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    async def publish(self, content, targets):
+        self.calls.append([target["id"] for target in targets])
+        return [
+            {"id": target["id"], "success": False, "error": "down"} if target["id"] in self.failing
+            else {"id": target["id"], "success": True, "post_id": f"remote-{target['id']}"}
+            for target in targets
+        ]
+
+
+def post(targets, published=None, failures=(), load_error=None):
+    data = {
+        "id": "post-1", "title": "t", "content": "c", "media_urls": "[]",
+        "targets": [{"id": target} for target in targets],
+        "target_failures": list(failures),
+        "published_targets": published or {},
+    }
+    if load_error:
+        data["load_error"] = load_error
+    return data
+
+
+def test_partial_failure_records_successful_targets():
+    dispatcher = PostDispatcher(publisher=FakePublisher(failing={"b"}))
+    post_id, status, published_at, error, published = asyncio.run(dispatcher.publish(post(["a", "b"])))
+    assert status == "failed" and published_at is None
+    assert "b: down" in error
+    assert json.loads(published) == {"a": "remote-a"}
+
+
+def test_retry_with_every_target_already_published_succeeds():
+    dispatcher = PostDispatcher(publisher=FakePublisher())
+    _, status, published_at, error, published = asyncio.run(dispatcher.publish(post([], published={"a": "x"})))
+    assert status == "published" and published_at is not None and error is None
+    assert json.loads(published) == {}
+
+
+def test_target_failures_and_load_errors_fail_the_post():
+    dispatcher = PostDispatcher(publisher=FakePublisher())
+    missing = {"id": "c", "success": False, "error": "账号不存在或无权访问"}
+    _, status, _, error, published = asyncio.run(dispatcher.publish(post(["a"], failures=[missing])))
+    assert status == "failed" and error.startswith("c: ")
+    assert json.loads(published) == {"a": "remote-a"}
+
+    _, status, _, error, _ = asyncio.run(dispatcher.publish(post([], load_error="读取目标账号失败: boom")))
+    assert status == "failed" and "boom" in error
+
+
+def test_post_without_targets_fails():
+    dispatcher = PostDispatcher(publisher=FakePublisher())
+    _, status, _, error, _ = asyncio.run(dispatcher.publish(post([])))
+    assert status == "failed" and error == "没有目标账号"
+
+
+def test_inflight_batches_are_capped_and_the_rest_wait_in_the_heap():
+    async def run():
+        dispatcher = PostDispatcher(batch_size=1, max_inflight=2, publisher=FakePublisher())
+        release = asyncio.Event()
+        dispatched, peak = [], 0
+
+        async def dispatch(post_ids):
+            nonlocal peak
+            peak = max(peak, len(dispatcher._inflight))
+            await release.wait()
+            dispatched.extend(post_ids)
+            return len(post_ids)
+
+        async def refill():
+            return False
+
+        async def release_stale_claims():
+            return 0
+
+        dispatcher.dispatch = dispatch
+        dispatcher.refill = refill
+        dispatcher.release_stale_claims = release_stale_claims
+        dispatcher._window_end = float("inf")
+        for index in range(5):
+            dispatcher.schedule(f"post-{index}", 1.0 + index)
+
+        runner = asyncio.create_task(dispatcher._run())
+        await asyncio.sleep(0.05)
+        waiting = len(dispatcher._queued)
+        inflight = len(dispatcher._inflight)
+        release.set()
+        for _ in range(100):
+            if len(dispatched) == 5:
+                break
+            await asyncio.sleep(0.01)
+        dispatcher._stopping = True
+        dispatcher._wakeup.set()
+        await runner
+        return inflight, waiting, peak, dispatched
+
+    inflight, waiting, peak, dispatched = asyncio.run(run())
+    assert inflight == 2 and waiting == 3
+    assert peak <= 2
+    assert dispatched == [f"post-{index}" for index in range(5)]
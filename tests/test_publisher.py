@@ -0,0 +1,147 @@
+import asyncio
+import importlib.util
+import time
+import uuid
+
+import pytest
+from cryptography.fernet import Fernet
+
+from backend.security import SecurityManager
+from backend.services import publisher as publisher_module
+
+OWNER = str(uuid.uuid4())
+
+
+class FakeConnection:
+    """ 只实现 load_targets 用到的 fetch，按 TARGETS_SQL 的条件过滤内存中的账号 """
+
+    def __init__(self, accounts):
+        self.accounts = accounts
+        self.queries = []
+
+    async def fetch(self, sql, account_ids, user_id):
+        self.queries.append((account_ids, user_id))
+        return [
+            {key: account[key] for key in ("id", "platform", "account_id", "account_handle", "access_token")}
+            for account in self.accounts
+            if str(account["id"]) in account_ids and account["user_id"] == user_id
+        ]
+
+
+@pytest.fixture
+def security(monkeypatch):
+    manager = SecurityManager([Fernet.generate_key().decode()])
+    monkeypatch.setattr(publisher_module, "get_security_manager", lambda: manager)
+    return manager
+
+
+def account(security, user_id=OWNER, token="token", encrypt=True):
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "platform": "facebook",
+        "account_id": "page",
+        "account_handle": "handle",
+        "access_token": security.encrypt(token) if encrypt else token,
+    }
+
+
+def test_load_targets_keeps_order_and_decrypts(security):
+    first, second = account(security, token="a"), account(security, token="b")
+    conn = FakeConnection([first, second])
+
+    targets, failures = asyncio.run(publisher_module.load_targets(conn, [second["id"], first["id"]], OWNER))
+
+    assert [target["access_token"] for target in targets] == ["b", "a"]
+    assert targets[0]["id"] == str(second["id"])
+    assert failures == []
+
+
+def test_load_targets_reports_other_users_and_malformed_ids(security):
+    own, foreign = account(security), account(security, user_id=str(uuid.uuid4()))
+    conn = FakeConnection([own, foreign])
+
+    targets, failures = asyncio.run(
+        publisher_module.load_targets(conn, [own["id"], foreign["id"], "not-a-uuid", None], OWNER)
+    )
+
+    assert [target["id"] for target in targets] == [str(own["id"])]
+    assert {failure["id"] for failure in failures} == {str(foreign["id"]), "not-a-uuid", "None"}
+    assert all(failure["success"] is False for failure in failures)
+    # 格式错误的 id 不会被送进 ::uuid[] 转换
+    assert conn.queries == [([str(own["id"]), str(foreign["id"])], OWNER)]
+
+
+def test_load_targets_isolates_undecryptable_tokens(security):
+    good, broken = account(security, token="ok"), account(security, token="garbage", encrypt=False)
+    conn = FakeConnection([good, broken])
+
+    targets, failures = asyncio.run(publisher_module.load_targets(conn, [good["id"], broken["id"]], OWNER))
+
+    assert [target["access_token"] for target in targets] == ["ok"]
+    assert [failure["id"] for failure in failures] == [str(broken["id"])]
+    assert failures[0]["platform"] == "facebook"
+
+
+def test_load_targets_skips_query_without_valid_ids(security):
+    conn = FakeConnection([])
+    targets, failures = asyncio.run(publisher_module.load_targets(conn, ["x"], OWNER))
+    assert targets == [] and len(failures) == 1
+    assert conn.queries == []
+
+
+def make_adapter(delay):
+    class SleepyAdapter:
+        """ 每次发布耗时 delay 秒，记录同时进行的最大请求数 """
+        active = 0
+        peak = 0
+
+        async def publish(self, content, target):
+            cls = type(self)
+            cls.active += 1
+            cls.peak = max(cls.peak, cls.active)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                cls.active -= 1
+            return {"post_id": f"remote-{target['id']}"}
+
+    return SleepyAdapter
+
+
+def timed_publish(publisher, count):
+    targets = [{"id": str(index), "platform": "sleepy", "account_id": str(index)} for index in range(count)]
+
+    async def run():
+        started = time.perf_counter()
+        results = await publisher.publish({"text_content": "hi"}, targets)
+        return results, time.perf_counter() - started
+
+    return asyncio.run(run())
+
+
+def test_targets_are_published_concurrently():
+    adapter = make_adapter(0.2)
+    results, elapsed = timed_publish(publisher_module.Publisher({"sleepy": adapter}, concurrency=10), 8)
+    assert [result["post_id"] for result in results] == [f"remote-{index}" for index in range(8)]
+    # 总耗时接近单个目标的耗时，而不是 8 次之和
+    assert elapsed < 0.2 * 2
+    assert adapter.peak == 8
+
+
+def test_platform_concurrency_limit_is_respected():
+    adapter = make_adapter(0.1)
+    results, elapsed = timed_publish(publisher_module.Publisher({"sleepy": adapter}, concurrency=3), 9)
+    assert all(result["success"] for result in results)
+    assert adapter.peak == 3
+    # 9 个目标、每次 3 个：三轮
+    assert 0.3 <= elapsed < 0.3 + 0.2
+
+
+def test_default_concurrency_comes_from_environment(monkeypatch):
+    monkeypatch.setenv("PLATFORM_PUBLISH_CONCURRENCY", "7")
+    spec = importlib.util.spec_from_file_location("publisher_env_copy", publisher_module.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module.PLATFORM_CONCURRENCY == 7
+    assert module.Publisher({"sleepy": make_adapter(0)}).concurrency == 7
@@ -0,0 +1,142 @@
+import asyncio
+import os
+
+import pytest
+from starlette.requests import Request
+
+from fastapi import HTTPException
+
+from backend.middlewares import rate_limiter
+from backend.middlewares.rate_limiter import MemoryBackend, RedisBackend, _parse_limit, bucket_limits, client_ip
+
+
+def make_request(peer, forwarded=None, headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    if forwarded:
+        raw.append((b"x-forwarded-for", forwarded.encode()))
+    return Request({"type": "http", "headers": raw, "client": (peer, 1234)})
+
+
+@pytest.fixture
+def tokens(monkeypatch):
+    """ 用固定的 token -> claims 表替代 JWT 校验 """
+    claims_by_token = {}
+
+    async def verify(token):
+        if token not in claims_by_token:
+            raise HTTPException(status_code=401, detail="invalid")
+        return claims_by_token[token]
+
+    monkeypatch.setattr(rate_limiter, "verify_access_token", verify)
+    return claims_by_token
+
+
+def test_tenant_header_is_not_trusted(tokens):
+    request = make_request("203.0.113.9", headers={"x-tenant-id": "victim"})
+    limits = asyncio.run(bucket_limits(request))
+    assert [key.split(":")[0] for key, _, _ in limits] == ["ip"]
+
+
+def test_tenant_bucket_comes_from_verified_token(tokens):
+    tokens["good"] = {"sub": "u1", "app_metadata": {"tenant_id": "t" * 500}}
+    request = make_request("203.0.113.9", headers={"Authorization": "Bearer good", "x-tenant-id": "victim"})
+    keys = [key for key, _, _ in asyncio.run(bucket_limits(request))]
+    assert keys[0] == "ip:203.0.113.9"
+    assert keys[1].startswith("tenant:") and len(keys[1]) == len("tenant:") + 16
+
+    bad = make_request("203.0.113.9", headers={"Authorization": "Bearer forged"})
+    assert len(asyncio.run(bucket_limits(bad))) == 1
+
+
+@pytest.mark.parametrize("value", ["0/60", "60/0", "-1/60", "abc"])
+def test_parse_limit_rejects_invalid_settings(value):
+    with pytest.raises(ValueError):
+        _parse_limit(value)
+
+
+def test_parse_limit():
+    assert _parse_limit("120/60") == (2.0, 120.0)
+    assert _parse_limit("30") == (0.5, 30.0)
+
+
+def test_client_ip_ignores_forwarded_header_from_untrusted_peer():
+    assert client_ip(make_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+
+
+def test_client_ip_uses_rightmost_untrusted_forwarded_address():
+    request = make_request("10.0.0.5", "1.2.3.4, 198.51.100.7, 10.0.0.4")
+    assert client_ip(request) == "198.51.100.7"
+
+
+def test_client_ip_rejects_garbage_forwarded_address():
+    assert client_ip(make_request("10.0.0.5", "not-an-ip")) == "10.0.0.5"
+
+
+def test_client_ip_falls_back_to_peer_when_chain_is_all_proxies():
+    assert client_ip(make_request("127.0.0.1", "10.0.0.1")) == "127.0.0.1"
+
+
+def test_memory_backend_takes_all_buckets_or_none():
+    backend = MemoryBackend()
+    limits = [("a", 1.0, 2.0), ("b", 1.0, 1.0)]
+
+    async def run():
+        first = await backend.take(limits)
+        second = await backend.take(limits)
+        only_a = await backend.take([("a", 1.0, 2.0)])
+        return first, second, only_a
+
+    first, second, only_a = asyncio.run(run())
+    assert first == (True, 0.0)
+    assert second[0] is False and second[1] > 0
+    # the rejected request must not have consumed from "a"
+    assert only_a[0] is True
+
+
+@pytest.fixture
+def redis_backend():
+    """Real Redis from RATE_LIMIT_TEST_REDIS_URL, otherwise fakeredis with Lua support"""
+    url = os.getenv("RATE_LIMIT_TEST_REDIS_URL")
+    if url:
+        pytest.importorskip("redis")
+        backend = RedisBackend(url, prefix="ratelimit-test:")
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        backend = RedisBackend(prefix="ratelimit-test:", client=fakeredis.FakeAsyncRedis())
+
+    async def cleanup():
+        keys = await backend._client.keys("ratelimit-test:*")
+        if keys:
+            await backend._client.delete(*keys)
+
+    asyncio.run(cleanup())
+    yield backend
+    asyncio.run(cleanup())
+
+
+def test_redis_backend_allows_burst_then_rejects(redis_backend):
+    limits = [("ip:1", 1.0, 3.0)]
+
+    async def run():
+        return [await redis_backend.take(limits) for _ in range(4)]
+
+    results = asyncio.run(run())
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    assert 0 < results[-1][1] <= 1.0
+
+
+def test_redis_backend_is_atomic_across_buckets(redis_backend):
+    async def run():
+        exhausted = await redis_backend.take([("dev:x", 0.001, 1.0)])
+        rejected = await redis_backend.take([("ip:2", 0.001, 1.0), ("dev:x", 0.001, 1.0)])
+        ip_only = await redis_backend.take([("ip:2", 0.001, 1.0)])
+        ttl = await redis_backend._client.ttl("ratelimit-test:ip:2")
+        return exhausted, rejected, ip_only, ttl
+
+    exhausted, rejected, ip_only, ttl = asyncio.run(run())
+    assert exhausted[0] is True
+    assert rejected[0] is False
+    # the ip bucket was checked but not charged by the rejected request
+    assert ip_only[0] is True
+    assert ttl > 0